@@ -13,6 +13,8 @@ from . import alc as alc
 from .argv import BaseMessageChainArgv as BaseMessageChainArgv
 from .dispatcher import AlconnaDispatcher as AlconnaDispatcher
 from .dispatcher import AlconnaOutputMessage as AlconnaOutputMessage
+from .lazy import LazyCommand as LazyCommand
+from .metrics import AlconnaStatsReport as AlconnaStatsReport
 from .model import CommandResult as CommandResult
 from .model import Header as Header
 from .model import Match as Match
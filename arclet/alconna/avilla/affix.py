@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import re
+import weakref
+from typing import Any, Optional
+
+from tarina import LRU
+
+from .router import _REGEX_SPECIAL
+
+
+class _Trie:
+    __slots__ = ("children", "end")
+
+    def __init__(self):
+        self.children: dict[str, _Trie] = {}
+        self.end = False
+
+
+class _Result:
+    __slots__ = ("literals", "hit", "lazy")
+
+    def __init__(self, literals: set[str], hit: Optional[tuple[int, str]]):
+        self.literals = literals
+        self.hit = hit
+        self.lazy: dict[int, Optional[str]] = {}
+
+
+class AffixMatcher:
+    """
+    前缀/后缀的聚合匹配器
+
+    所有字面量前缀 (后缀) 合并为一棵字典树, 不含分组的正则前缀合并为一个正则表达式;
+    每段文本只需匹配一次, 各个 MatchPrefix/MatchSuffix 从中取得各自的匹配结果.
+    正则后缀 (以 search 匹配, 靠前的分支仍可能在更右侧匹配) 与含分组或反向引用的正则 (合并后分组编号改变)
+    则各自单独匹配
+
+    `a|b` 形式的顶层分支视为多个备选, 按书写顺序取第一个匹配者
+    """
+
+    def __init__(self, suffix: bool = False, cache_size: int = 64):
+        self.suffix = suffix
+        self.literals: dict[int, list[str]] = {}
+        self.regexes: dict[int, re.Pattern[str]] = {}
+        self.sources: dict[int, str] = {}
+        self._count = 0
+        self._trie: Optional[_Trie] = None
+        self._order: dict[int, int] = {}
+        self._combined: Optional[re.Pattern[str]] = None
+        self._dirty = False
+        self._memo: LRU[str, _Result] = LRU(cache_size)
+
+    def register(self, source: str) -> int:
+        """注册一个前缀 (后缀) 表达式, 返回其编号"""
+        slot = self._count
+        self._count += 1
+        alternatives = source.split("|")
+        if not any(char in _REGEX_SPECIAL for char in source.replace("|", "")):
+            self.literals[slot] = alternatives
+        else:
+            self.regexes[slot] = re.compile(f"(?:{source})$" if self.suffix else f"(?:{source})")
+            self.sources[slot] = source
+        self._dirty = True
+        return slot
+
+    def unregister(self, slot: int):
+        self.literals.pop(slot, None)
+        self.regexes.pop(slot, None)
+        self.sources.pop(slot, None)
+        self._dirty = True
+
+    def bind(self, owner: Any, source: str) -> int:
+        """注册表达式, 并在 owner 被回收时注销"""
+        slot = self.register(source)
+        weakref.finalize(owner, self.unregister, slot)
+        return slot
+
+    def _build(self):
+        self._trie = _Trie()
+        for alternatives in self.literals.values():
+            for alt in alternatives:
+                node = self._trie
+                for char in reversed(alt) if self.suffix else alt:
+                    node = node.children.setdefault(char, _Trie())
+                node.end = True
+        self._order = {}
+        if not self.suffix:
+            for slot, pattern in self.regexes.items():
+                if not pattern.groups:
+                    self._order[slot] = len(self._order)
+        self._combined = None
+        if self._order:
+            body = "|".join(f"(?P<_affix{index}>(?:{self.sources[slot]}))" for slot, index in self._order.items())
+            try:
+                self._combined = re.compile(body)
+            except re.error:
+                self._combined = None
+        self._memo.clear()
+        self._dirty = False
+
+    def _resolve(self, text: str) -> _Result:
+        if self._dirty:
+            self._build()
+        if (res := self._memo.get(text, None)) is not None:
+            return res
+        literals: set[str] = set()
+        node = self._trie
+        path: list[str] = []
+        if node.end:  # type: ignore
+            literals.add("")
+        for char in reversed(text) if self.suffix else text:
+            if (node := node.children.get(char)) is None:  # type: ignore
+                break
+            path.append(char)
+            if node.end:
+                literals.add("".join(reversed(path)) if self.suffix else "".join(path))
+        hit = None
+        if self._combined is not None:
+            mat = self._combined.match(text)
+            if not mat:
+                hit = (len(self._order), "")
+            elif mat.lastgroup and mat.lastgroup.startswith("_affix"):
+                hit = (int(mat.lastgroup[6:]), mat[0])
+        res = self._memo[text] = _Result(literals, hit)
+        return res
+
+    def _single(self, slot: int, text: str) -> Optional[str]:
+        pattern = self.regexes[slot]
+        mat = pattern.search(text) if self.suffix else pattern.match(text)
+        return mat[0] if mat else None
+
+    def match(self, slot: int, text: str) -> Optional[str]:
+        """获取编号对应的表达式在该文本上的匹配部分, 不匹配时返回 None"""
+        res = self._resolve(text)
+        if (alternatives := self.literals.get(slot)) is not None:
+            for alt in alternatives:
+                if alt in res.literals:
+                    return alt
+            return
+        if res.hit is not None and (index := self._order.get(slot)) is not None:
+            # 锚定于开头的分支按书写顺序尝试, 命中的分支之前的前缀必定不匹配
+            if index < res.hit[0]:
+                return
+            if index == res.hit[0]:
+                return res.hit[1]
+        if slot not in res.lazy:
+            res.lazy[slot] = self._single(slot, text)
+        return res.lazy[slot]
+
+
+prefix_matcher = AffixMatcher()
+suffix_matcher = AffixMatcher(suffix=True)
@@ -1,18 +1,104 @@
 from __future__ import annotations
 
-from typing import Any
+import weakref
+from typing import Any, ClassVar, Hashable, Optional
 
 from arclet.alconna._internal._argv import Argv
 from arclet.alconna.argv import argv_config, set_default_argv_type
 from graia.amnesia.message import MessageChain
 from graia.amnesia.message.element import Element, Text
+from tarina import LRU
+
+_object_hash = object.__hash__
+
+
+def _stable(value: Any, depth: int) -> Hashable:
+    if (_hash := value.__class__.__hash__) is not None and _hash is not _object_hash:
+        return value
+    if depth and hasattr(value, "__dict__"):
+        return value.__class__, *(_stable(v, depth - 1) for v in vars(value).values())
+    return repr(value)
+
+
+def element_key(elem: Element) -> Hashable:
+    """
+    元素的稳定标识
+
+    由元素类型与其各属性的值组成, 不构造 repr 字符串; 仅以默认 id 作为哈希的对象会退化为 repr, 以避免对象复用造成的碰撞
+    """
+    return _stable(elem, 2)
 
 
 class BaseMessageChainArgv(Argv[MessageChain]):
+    token_memo: ClassVar[Optional[LRU[int, tuple[weakref.ref, Hashable]]]] = None
+    """元素标识的缓存, 默认关闭"""
+    shared: ClassVar[LRU[int, tuple[weakref.ref, dict[Hashable, tuple[tuple[Any, ...], int, int]]]]] = LRU(128)
+    """已登记消息链的预处理结果, 按预处理配置区分"""
+
+    @classmethod
+    def share(cls, message: MessageChain):
+        """
+        登记消息链, 使各命令解析该消息链时复用同一份预处理结果 (元素转文本、去除空白与 token)
+
+        登记后的消息链不应再被修改
+        """
+        if (entry := cls.shared.get(id(message), None)) is None or entry[0]() is not message:
+            cls.shared[id(message)] = (weakref.ref(message), {})
+
+    def build(self, data: MessageChain):
+        if (entry := self.shared.get(id(data), None)) is None or entry[0]() is not data:
+            return super().build(data)
+        try:
+            key = (self.to_text, self.message_cache, tuple(self.filter_out), tuple(self.preprocessors.items()))
+            done = entry[1].get(key)
+        except TypeError:
+            return super().build(data)
+        if done is None:
+            super().build(data)
+            entry[1][key] = (tuple(self.raw_data), self.ndata, self.token)
+            return self
+        self.reset()
+        self.origin = data
+        self.raw_data = list(done[0])
+        self.bak_data = list(done[0])
+        self.ndata, self.token = done[1], done[2]
+        return self
+
+    @classmethod
+    def enable_token_memo(cls, size: int = 256):
+        """开启元素标识的缓存, 适用于同一元素对象被多次解析的场景 (如多个命令解析同一消息)"""
+        cls.token_memo = LRU(size)
+
+    @classmethod
+    def disable_token_memo(cls):
+        cls.token_memo = None
+
+    @staticmethod
+    def element_token(elem: Any) -> Hashable:
+        if (memo := BaseMessageChainArgv.token_memo) is None:
+            return element_key(elem)
+        if (cached := memo.get(id(elem), None)) is not None and cached[0]() is elem:
+            return cached[1]
+        key = element_key(elem)
+        try:
+            memo[id(elem)] = (weakref.ref(elem), key)
+        except TypeError:
+            pass
+        return key
 
     @staticmethod
     def generate_token(data: list[Any | list[str]]) -> int:
-        return hash("".join(i.__repr__() for i in data))
+        for i in data:
+            if i.__class__ is not str:
+                break
+        else:
+            # 纯文本消息无需逐个求取元素标识
+            return hash(tuple(data))
+        token = BaseMessageChainArgv.element_token
+        try:
+            return hash(tuple(i if i.__class__ is str else token(i) for i in data))
+        except TypeError:
+            return hash("".join(i.__repr__() for i in data))
 
 
 set_default_argv_type(BaseMessageChainArgv)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from avilla.standard.core.message import MessageReceived
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from .model import BudgetConfig
+
+
+def offender_key(event: MessageReceived) -> Hashable:
+    """超限计数的归属标识: (账号, 用户)"""
+    return event.context.account.route, event.context.client
+
+
+class ParseBudget:
+    """
+    解析预算
+
+    在解析前以消息的文本长度与元素数量拒绝过大的输入; 使用 parse_executor 时还可限制解析的耗时.
+    同一用户在冷却时间内超限次数达到上限后, 其后续消息将被直接忽略, 直到冷却结束
+    """
+
+    def __init__(self, config: BudgetConfig, size: int = 1024):
+        self.max_length = config.get("max_length")
+        self.max_elements = config.get("max_elements")
+        self.max_time = config.get("max_time")
+        self.max_strikes = config.get("max_strikes", 3)
+        self.cooldown = config.get("cooldown", 60.0)
+        self.size = size
+        self.strikes: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+
+    def exceeded(self, message: MessageChain) -> bool:
+        """判断消息是否超出长度或元素数量的限制"""
+        if self.max_elements is not None and len(message.content) > self.max_elements:
+            return True
+        if self.max_length is not None:
+            length = 0
+            for elem in message.content:
+                if isinstance(elem, Text):
+                    length += len(elem.text)
+                    if length > self.max_length:
+                        return True
+        return False
+
+    def blocked(self, key: Hashable) -> bool:
+        """判断该用户是否因多次超限而处于冷却中"""
+        if (item := self.strikes.get(key)) is None:
+            return False
+        if time.monotonic() - item[0] > self.cooldown:
+            del self.strikes[key]
+            return False
+        return item[1] >= self.max_strikes
+
+    def strike(self, key: Hashable) -> int:
+        """记录一次超限, 返回冷却时间内的累计次数"""
+        now = time.monotonic()
+        count = 1
+        if (item := self.strikes.pop(key, None)) is not None and now - item[0] <= self.cooldown:
+            count = item[1] + 1
+        self.strikes[key] = (now, count)
+        while len(self.strikes) > self.size:
+            self.strikes.popitem(last=False)
+        return count
+
+    def forgive(self, key: Optional[Hashable] = None):
+        """清除超限记录; 不传入标识时清除全部"""
+        if key is None:
+            self.strikes.clear()
+        else:
+            self.strikes.pop(key, None)
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import FunctionType, MethodType, ModuleType
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, TypeVar
+
+from tarina import LRU
+
+T = TypeVar("T")
+
+
+class EventCache(Generic[T]):
+    """
+    事件级缓存
+
+    以事件来源 (消息 id 与账号路由) 为分区, 同一事件的所有调度器共享同一分区;
+    事件传播结束并被回收后, 其分区随之释放
+    """
+
+    def __init__(self, size: int = 256):
+        self.data: LRU[str, dict[Hashable, T]] = LRU(size)
+
+    def partition(self, event: Any, source_id: str) -> dict[Hashable, T]:
+        """获取事件对应的缓存分区, 不存在时创建"""
+        if (part := self.data.get(source_id, None)) is None:
+            part = self.data[source_id] = {}
+            with contextlib.suppress(TypeError):
+                weakref.finalize(event, self.discard, source_id)
+        return part
+
+    def discard(self, source_id: str):
+        """释放事件对应的缓存分区"""
+        with contextlib.suppress(KeyError):
+            del self.data[source_id]
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ResultStore(Generic[T]):
+    """
+    解析结果的去重存储
+
+    同一消息的多个监听器共享同一次解析的结果 (asyncio.Future);
+    超出容量或过期时淘汰已完成的结果, 尚未完成的结果会被保留, 直到其完成
+    """
+
+    def __init__(self, capacity: int = 64, ttl: float = 30.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.data: OrderedDict[str, tuple[float, asyncio.Future[T]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stamp: float, fut: asyncio.Future[T], now: float):
+        return fut.done() and now - stamp > self.ttl
+
+    def get(self, key: str) -> asyncio.Future[T] | None:
+        """获取已有的结果, 不存在或过期时返回 None"""
+        if (item := self.data.get(key)) is None:
+            self.misses += 1
+            return
+        if self._expired(*item, time.monotonic()):
+            del self.data[key]
+            self.evictions += 1
+            self.misses += 1
+            return
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: str) -> asyncio.Future[T]:
+        """为该键创建一个新的结果, 若已存在则返回已有的结果"""
+        if (item := self.data.get(key)) is not None:
+            return item[1]
+        fut = asyncio.get_running_loop().create_future()
+        self.data[key] = (time.monotonic(), fut)
+        self.shrink()
+        return fut
+
+    def shrink(self):
+        """淘汰过期的结果, 并在超出容量时淘汰最久未使用的已完成结果"""
+        now = time.monotonic()
+        overflow = len(self.data) - self.capacity
+        expired = []
+        for key, (stamp, fut) in self.data.items():
+            if overflow <= 0 and now - stamp <= self.ttl:
+                break
+            if fut.done():
+                expired.append(key)
+                overflow -= 1
+        for key in expired:
+            del self.data[key]
+        self.evictions += len(expired)
+
+    def configure(self, capacity: int | None = None, ttl: float | None = None):
+        if capacity is not None:
+            self.capacity = capacity
+        if ttl is not None:
+            self.ttl = ttl
+        self.shrink()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.data),
+            "pinned": sum(not fut.done() for _, fut in self.data.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ReplyCache(Generic[T]):
+    """
+    引用消息的缓存
+
+    按账号分区; 同一引用消息的并发请求会被合并为一次拉取;
+    拉取失败的结果会在短时间内被缓存, 以避免重复请求
+    """
+
+    def __init__(self, size: int = 64, ttl: float = 300.0, negative_ttl: float = 10.0):
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.partitions: dict[Hashable, OrderedDict[Hashable, tuple[float, T | None | asyncio.Future[T | None]]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def configure(self, size: int | None = None, ttl: float | None = None, negative_ttl: float | None = None):
+        if size is not None:
+            self.size = size
+        if ttl is not None:
+            self.ttl = ttl
+        if negative_ttl is not None:
+            self.negative_ttl = negative_ttl
+
+    async def fetch(
+        self,
+        account: Hashable,
+        key: Hashable,
+        pull: Callable[[], Awaitable[T]],
+        errors: tuple[type[BaseException], ...] = (),
+    ) -> T | None:
+        """
+        获取引用消息, 缓存未命中时调用 pull 拉取
+
+        Args:
+            account (Hashable): 账号标识, 用于分区
+            key (Hashable): 引用消息的标识
+            pull (Callable[[], Awaitable[T]]): 拉取函数
+            errors (tuple[type[BaseException], ...]): 视为拉取失败的异常类型, 失败时返回 None
+        """
+        part = self.partitions.setdefault(account, OrderedDict())
+        if (item := part.get(key)) is not None:
+            expire, value = item
+            if isinstance(value, asyncio.Future):
+                self.coalesced += 1
+                return await asyncio.shield(value)
+            if time.monotonic() < expire:
+                part.move_to_end(key)
+                self.hits += 1
+                return value
+            del part[key]
+        self.misses += 1
+        fut: asyncio.Future[T | None] = asyncio.get_running_loop().create_future()
+        part[key] = (0.0, fut)
+        value = None
+        try:
+            value = await pull()
+        except errors:
+            self.failures += 1
+        finally:
+            fut.set_result(value)
+            part.pop(key, None)
+        part[key] = (time.monotonic() + (self.negative_ttl if value is None else self.ttl), value)
+        while len(part) > self.size:
+            part.popitem(last=False)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": sum(len(part) for part in self.partitions.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
+
+    def clear(self):
+        self.partitions.clear()
+
+
+@dataclass(frozen=True)
+class OutputRecord:
+    """一条输出信息"""
+
+    command: str
+    """命令路径"""
+    otype: str
+    """输出类型, 如 "help", "error" """
+    text: str
+    source_id: str
+    user: Hashable
+    time: float
+
+
+class OutputStore:
+    """
+    输出信息的存储
+
+    按消息记录各命令产生的帮助、报错等输出信息, 可按消息或用户查询最近的输出;
+    超出容量 (消息数) 或过期的记录将被淘汰. 默认关闭, 关闭时调度器不写入任何记录
+    """
+
+    def __init__(self, capacity: int = 256, ttl: float = 300.0):
+        self.enabled = False
+        self.capacity = capacity
+        self.ttl = ttl
+        self.messages: OrderedDict[str, dict[str, OutputRecord]] = OrderedDict()
+        self.users: dict[Hashable, OutputRecord] = {}
+
+    def configure(self, capacity: int | None = None, ttl: float | None = None):
+        if capacity is not None:
+            self.capacity = capacity
+        if ttl is not None:
+            self.ttl = ttl
+        self.shrink()
+
+    def add(self, command: str, otype: str, text: str, source_id: str, user: Hashable):
+        record = OutputRecord(command, otype, text, source_id, user, time.monotonic())
+        if (records := self.messages.get(source_id)) is None:
+            records = self.messages[source_id] = {}
+        else:
+            self.messages.move_to_end(source_id)
+        records[command] = record
+        self.users[user] = record
+        self.shrink()
+
+    def _alive(self, record: OutputRecord | None) -> OutputRecord | None:
+        if record is not None and time.monotonic() - record.time <= self.ttl:
+            return record
+
+    def get(self, source_id: str, command: str | None = None) -> OutputRecord | None:
+        """获取某条消息产生的输出; 不指定命令时返回其中最近的一条"""
+        if not (records := self.messages.get(source_id)):
+            return
+        if command is not None:
+            return self._alive(records.get(command))
+        return self._alive(max(records.values(), key=lambda x: x.time))
+
+    def last(self, user: Hashable) -> OutputRecord | None:
+        """获取某个用户最近一次触发的输出"""
+        return self._alive(self.users.get(user))
+
+    def shrink(self):
+        """淘汰过期的记录, 并在超出容量时淘汰最早的消息"""
+        now = time.monotonic()
+        while self.messages:
+            source_id, records = next(iter(self.messages.items()))
+            if len(self.messages) <= self.capacity and any(now - i.time <= self.ttl for i in records.values()):
+                break
+            del self.messages[source_id]
+            for record in records.values():
+                if self.users.get(record.user) is record:
+                    del self.users[record.user]
+
+    def forget(self, command: str):
+        """移除某个命令的全部记录"""
+        for source_id, records in list(self.messages.items()):
+            if (record := records.pop(command, None)) is None:
+                continue
+            if self.users.get(record.user) is record:
+                del self.users[record.user]
+            if not records:
+                del self.messages[source_id]
+
+    def clear(self):
+        self.messages.clear()
+        self.users.clear()
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class RenderEntry(Generic[T]):
+    """一条可复用的输出: 输出文本及其经各个转换函数得到的消息"""
+
+    __slots__ = ("otype", "text", "head", "stamp", "renders")
+
+    def __init__(self, otype: str, text: str, head: Any, stamp: Hashable):
+        self.otype = otype
+        self.text = text
+        self.head = head
+        self.stamp = stamp
+        self.renders: dict[Any, T] = {}
+
+
+class RenderCache(Generic[T]):
+    """
+    输出渲染缓存
+
+    以 (命令哈希, 语言, 输出类型, 规范化后的请求) 为键, 记录输出文本与转换后的消息;
+    条目的版本戳 (如快捷指令) 与当前不符时该条目失效. 语言切换时应整体清空 (如注册为 LocaleTexts 的回调).
+    命令重建后哈希改变, 旧条目不再被命中并随容量淘汰
+    """
+
+    def __init__(self, size: int = 256):
+        self.data: LRU[tuple, RenderEntry[T]] = LRU(size)
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, command: int, locale: str, otypes: Iterable[str], request: str, stamp: Callable[[], Hashable]
+    ) -> RenderEntry[T] | None:
+        """查找请求对应的输出, 命中时计入命中数; 未命中不计数, 待解析确实产生了可复用的输出 (set) 时才计为未命中"""
+        for otype in otypes:
+            if (entry := self.data.get((command, locale, otype, request), None)) is None:
+                continue
+            if entry.stamp != stamp():
+                self.invalidate(command)
+                break
+            self.hits += 1
+            return entry
+
+    def peek(self, command: int, locale: str, otype: str, request: str) -> RenderEntry[T] | None:
+        """查找请求对应的输出, 不计入命中率"""
+        return self.data.get((command, locale, otype, request), None)
+
+    def set(self, command: int, locale: str, otype: str, request: str, text: str, head: Any, stamp: Hashable):
+        """记录解析产生的输出, 计为一次未命中"""
+        self.misses += 1
+        entry = self.data[(command, locale, otype, request)] = RenderEntry(otype, text, head, stamp)
+        return entry
+
+    def invalidate(self, command: int):
+        """移除某个命令的全部条目"""
+        for key in [key for key in self.data.keys() if key[0] == command]:
+            del self.data[key]
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.data), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+_ATOMIC = (str, bytes, int, float, bool, type(None))
+_OPAQUE = (type, ModuleType, FunctionType, MethodType, weakref.ref)
+
+
+def retained(obj: Any, depth: int = 4, opaque: tuple[type, ...] = ()) -> int:
+    """
+    估算缓存所持有的内存 (字节)
+
+    递归计算容器元素、已完成的 Future 的结果与对象属性, 至多 depth 层; 同一对象只计算一次,
+    类、函数、模块与 opaque 中类型的对象 (如共享的命令实例) 不计入
+    """
+    seen: set[int] = set()
+
+    def size(o: Any, level: int) -> int:
+        if id(o) in seen or isinstance(o, _OPAQUE) or (opaque and isinstance(o, opaque)):
+            return 0
+        seen.add(id(o))
+        total = sys.getsizeof(o, 0)
+        if level <= 0 or isinstance(o, _ATOMIC):
+            return total
+        if isinstance(o, asyncio.Future):
+            if o.done() and not o.cancelled() and o.exception() is None:
+                total += size(o.result(), level - 1)
+        elif hasattr(o, "items") and callable(o.items):
+            for k, v in list(o.items()):
+                total += size(k, level - 1) + size(v, level - 1)
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            for i in list(o):
+                total += size(i, level - 1)
+        elif hasattr(o, "__dict__"):
+            total += size(vars(o), level - 1)
+        elif slots := getattr(o.__class__, "__slots__", ()):
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(o, name):
+                    total += size(getattr(o, name), level - 1)
+        return total
+
+    return size(obj, depth)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from arclet.alconna.core import Alconna
+
+from arclet.alconna import output_manager
+
+_current: ContextVar[Optional[dict[str, Any]]] = ContextVar("alconna_avilla_capture", default=None)
+
+
+def _action(text: str) -> dict[str, Any]:
+    if (buffer := _current.get()) is not None:
+        buffer["output"] = text
+    return {"output": text}
+
+
+def install(name: str):
+    """为命令设置捕获用的输出行为; 已设置时不做任何修改"""
+    if (sender := output_manager.outputs.get(name)) is not None:
+        if sender.action is not _action:
+            sender.action = _action
+    elif output_manager.cache.get(name) is not _action:
+        output_manager.set_action(_action, name)
+
+
+@contextmanager
+def capture(command: Alconna) -> Iterator[dict[str, Any]]:
+    """
+    捕获解析期间产生的输出信息 (帮助、快捷指令、补全等)
+
+    捕获结果存放于当前上下文 (contextvars) 中, 同一命令的并发解析互不干扰, 也不会在每次解析时修改 output_manager
+    """
+    install(command.name)
+    buffer: dict[str, Any] = {}
+    token = _current.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current.reset(token)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, ClassVar, Hashable, Iterator, Optional
+
+from arclet.alconna.completion import CompSession, comp_ctx
+from arclet.alconna.core import Alconna
+from avilla.standard.core.message import MessageReceived
+from graia.broadcast import Broadcast
+from graia.broadcast.exceptions import ExecutionStop, PropagationCancelled
+
+
+def session_key(event: MessageReceived) -> Hashable:
+    """补全会话的归属标识: (账号, 场景, 用户)"""
+    ctx = event.context
+    return ctx.account.route, ctx.scene, ctx.client
+
+
+@contextlib.contextmanager
+def activate(session: CompSession) -> Iterator[CompSession]:
+    """
+    在当前上下文内激活补全会话, 离开时立即重置 comp_ctx
+
+    会话因此不会在等待补全期间持有 comp_ctx 的 token, 可在任意上下文中安全地退出
+    """
+    try:
+        with session:
+            yield session
+    finally:
+        if session._token is not None:
+            comp_ctx.reset(session._token)
+            session._token = None
+
+
+class CompletionPool:
+    """
+    补全会话池
+
+    为同一命令的每个用户维护独立的补全会话; 会话数量有上限, 超出上限或闲置超时的会话将被淘汰.
+    会话应通过 activate 使用, 因而淘汰时不会重置其他上下文中的 comp_ctx
+    """
+
+    def __init__(self, command: Optional[Alconna], size: int = 256, timeout: float = 60.0):
+        self.command = command
+        self.size = size
+        self.timeout = timeout
+        self.sessions: OrderedDict[Hashable, tuple[float, CompSession]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CompSession]:
+        """获取该标识对应的会话, 不存在或已超时时返回 None"""
+        if (item := self.sessions.get(key)) is None:
+            return
+        if time.monotonic() - item[0] > self.timeout:
+            self.release(key)
+            return
+        return item[1]
+
+    def acquire(self, key: Hashable) -> CompSession:
+        """获取或创建该标识对应的会话"""
+        if (item := self.sessions.pop(key, None)) is not None:
+            session = item[1]
+        else:
+            session = CompSession(self.command)  # type: ignore
+        self.sessions[key] = (time.monotonic(), session)
+        self.shrink()
+        return session
+
+    def touch(self, key: Hashable):
+        """刷新会话的活跃时间"""
+        if (item := self.sessions.pop(key, None)) is not None:
+            self.sessions[key] = (time.monotonic(), item[1])
+
+    def release(self, key: Hashable, session: Optional[CompSession] = None):
+        """
+        退出并移除该标识对应的会话
+
+        Args:
+            key (Hashable): 会话标识
+            session (CompSession, optional): 仅当该标识当前对应的会话为此会话时才移除
+        """
+        if (item := self.sessions.get(key)) is None:
+            return
+        if session is not None and item[1] is not session:
+            return
+        del self.sessions[key]
+        item[1].exit()
+
+    def shrink(self):
+        """淘汰超时的会话, 并在超出上限时淘汰最久未活跃的会话"""
+        now = time.monotonic()
+        while self.sessions:
+            key, (stamp, _) = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.size and now - stamp <= self.timeout:
+                break
+            self.release(key)
+
+    def clear(self):
+        for _, session in self.sessions.values():
+            session.exit()
+        self.sessions.clear()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, key: Hashable):
+        return key in self.sessions
+
+
+class CompletionInterrupt:
+    """
+    补全会话的中断路由
+
+    每个优先级只挂载一个监听器, 以 (账号, 场景, 用户) 为键直接找到等待中的会话;
+    没有对应会话的消息将按正常流程继续传播
+    """
+
+    instances: ClassVar[weakref.WeakKeyDictionary[Broadcast, CompletionInterrupt]] = weakref.WeakKeyDictionary()
+
+    def __init__(self, broadcast: Broadcast):
+        self.broadcast = broadcast
+        self.waiting: dict[
+            int, dict[Hashable, list[tuple[asyncio.Future, Callable[[MessageReceived], Awaitable[Any]], Any]]]
+        ] = {}
+
+    @classmethod
+    def of(cls, broadcast: Broadcast) -> CompletionInterrupt:
+        """获取该 Broadcast 对应的中断路由"""
+        if (inst := cls.instances.get(broadcast)) is None:
+            inst = cls.instances[broadcast] = cls(broadcast)
+        return inst
+
+    def _table(self, priority: int):
+        if (table := self.waiting.get(priority)) is not None:
+            return table
+        table = self.waiting[priority] = {}
+
+        async def route(event: MessageReceived):
+            if not table or not (waiters := table.get(session_key(event))):
+                return
+            fut, handler, _ = waiters[-1]
+            if fut.done():
+                return
+            try:
+                result = await handler(event)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+                return
+            if result is not None and not fut.done():
+                fut.set_result(result)
+                raise PropagationCancelled
+
+        self.broadcast.receiver(MessageReceived, priority=priority)(route)
+        return table
+
+    async def wait(
+        self,
+        key: Hashable,
+        handler: Callable[[MessageReceived], Awaitable[Any]],
+        priority: int = 15,
+        timeout: Optional[float] = None,
+        owner: Any = None,
+    ):
+        """
+        等待来自该标识的下一条消息, 并返回 handler 处理后的结果
+
+        同一标识存在多个等待时, 由最晚开始等待的一方接收消息
+
+        Args:
+            key (Hashable): 会话标识
+            handler (Callable[[MessageReceived], Awaitable[Any]]): 消息处理函数, 返回 None 时消息继续传播
+            priority (int): 监听器优先级
+            timeout (float, optional): 超时时间, 超时后抛出 asyncio.TimeoutError
+            owner (Any, optional): 等待的归属者, 可通过 cancel 一并取消
+        """
+        table = self._table(priority)
+        fut = asyncio.get_running_loop().create_future()
+        entry = (fut, handler, owner)
+        waiters = table.setdefault(key, [])
+        waiters.append(entry)
+        try:
+            return await asyncio.wait_for(fut, timeout) if timeout else await fut
+        finally:
+            with contextlib.suppress(ValueError):
+                waiters.remove(entry)
+            if not waiters and table.get(key) is waiters:
+                del table[key]
+
+    def cancel(self, owner: Any) -> int:
+        """以 ExecutionStop 结束该归属者的所有等待, 返回结束的数量"""
+        count = 0
+        for table in self.waiting.values():
+            for waiters in table.values():
+                for fut, _, _owner in waiters:
+                    if _owner is owner and not fut.done():
+                        fut.set_exception(ExecutionStop())
+                        count += 1
+        return count
+
+    @classmethod
+    def cancel_all(cls, owner: Any) -> int:
+        """在所有中断路由中结束该归属者的等待"""
+        return sum(inst.cancel(owner) for inst in list(cls.instances.values()))
+
+    def __len__(self):
+        return sum(len(waiters) for table in self.waiting.values() for waiters in table.values())
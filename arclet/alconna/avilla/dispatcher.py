@@ -1,56 +1,110 @@
 import asyncio
 import contextlib
 from atexit import register
-from typing import Any, ClassVar, Dict, Literal, Optional, Union, get_args
+from concurrent.futures import Executor
+from copy import copy
+from time import perf_counter
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+)
 
 from arclet.alconna.builtin import generate_duplication
 from arclet.alconna.completion import CompSession
 from arclet.alconna.core import Alconna
 from arclet.alconna.duplication import Duplication
-from arclet.alconna.exceptions import SpecialOptionTriggered
+from arclet.alconna.exceptions import FuzzyMatchSuccess, InvalidParam, NullMessage, SpecialOptionTriggered
+from arclet.alconna.manager import command_manager
+from arclet.alconna.model import HeadResult
 from arclet.alconna.stub import ArgsStub, OptionStub, SubcommandStub
 from arclet.alconna.tools import AlconnaFormat
 from avilla.core import Context, Message, Notice, Selector
-from avilla.core.exceptions import UnknownTarget, ActionFailed
+from avilla.core.exceptions import ActionFailed, UnknownTarget
 from avilla.standard.core.message import MessageReceived
-from creart import it
 from graia.amnesia.message import MessageChain
 from graia.amnesia.message.element import Text
 from graia.broadcast.entities.dispatcher import BaseDispatcher
 from graia.broadcast.entities.event import Dispatchable
 from graia.broadcast.exceptions import ExecutionStop
 from graia.broadcast.interfaces.dispatcher import DispatcherInterface
-from graia.broadcast.interrupt import InterruptControl
 from graia.broadcast.interrupt.waiter import Waiter
 from graia.broadcast.utilles import run_always_await
-from tarina import LRU, generic_isinstance, generic_issubclass
+from tarina import generic_isinstance, generic_issubclass
 from tarina.generic import get_origin
 
-from arclet.alconna import Arparma, Empty, output_manager
+from arclet.alconna import Arparma, Empty
 
+from .argv import BaseMessageChainArgv
+from .budget import ParseBudget, offender_key
+from .cache import EventCache, OutputStore, RenderCache, RenderEntry, ReplyCache, ResultStore
+from .capture import capture
+from .completion import CompletionInterrupt, CompletionPool, activate, session_key
+from .exclusive import ExclusiveGroup, Turn
+from .executor import parse_guarded, parse_in_executor
 from .i18n import Lang, lang
-from .model import CommandResult, CompConfig, Header, Match, Query, TConvert, TSource
+from .lazy import LazyCommand
+from .metrics import metrics
+from .model import BudgetConfig, CommandResult, CompConfig, Header, Match, Query, SendConfig, TConvert, TSource
+from .pipeline import Pipeline, PipelineState, Stage
+from .router import CommandRouter
+from .routing import route_tables
+from .sender import OutputSender
+from .texts import completion_help, texts
 
-reply_cache: "LRU[str, Message]" = LRU(64)
-result_cache: "Dict[int, LRU[str, asyncio.Future[Optional[CommandResult]]]]" = {}
-output_cache: "Dict[int, LRU[str, str]]" = {}
+reply_cache: "ReplyCache[Message]" = ReplyCache(64)
+result_cache: "Dict[int, ResultStore[Optional[CommandResult]]]" = {}
+output_store = OutputStore()
+render_cache: "RenderCache[MessageChain]" = RenderCache()
+texts.on_change(lambda _: render_cache.clear())
+source_cache: "EventCache[Tuple[bool, MessageChain]]" = EventCache()
+
+
+def get_source_id(source: MessageReceived) -> str:
+    return f"{source.message.id}@{source.context.account.route}"
+
+
+def get_result_store(alc: Alconna) -> "ResultStore[Optional[CommandResult]]":
+    if (store := result_cache.get(alc._hash)) is None:
+        store = result_cache[alc._hash] = ResultStore(AlconnaDispatcher.result_capacity, AlconnaDispatcher.result_ttl)
+    return store
 
 
 def get_future(alc: Alconna, source: str):
-    return result_cache[alc._hash].get(source)
+    return get_result_store(alc).get(source)
 
 
 def set_future(alc: Alconna, source: str):
-    return result_cache[alc._hash].setdefault(source, asyncio.Future())
+    return get_result_store(alc).set(source)
+
+
+def release_partition(key: int):
+    """释放以命令哈希为键的缓存分区: 解析结果与路由表"""
+    if (store := result_cache.pop(key, None)) is not None:
+        store.clear()
+    route_tables.pop(key, None)
+    render_cache.invalidate(key)
 
 
 def clear():
-    for lru in result_cache.values():
-        lru.clear()
-    for dq in output_cache.values():
-        dq.clear()
+    for store in result_cache.values():
+        store.clear()
     result_cache.clear()
-    output_cache.clear()
+    output_store.clear()
+    render_cache.clear()
+    route_tables.clear()
+    source_cache.clear()
+    reply_cache.clear()
 
 
 register(clear)
@@ -90,6 +144,68 @@ class AlconnaDispatcher(BaseDispatcher):
         return cls(AlconnaFormat(command, args), send_flag="reply")
 
     default_send_handler: ClassVar[TConvert] = lambda _, x: MessageChain([Text(x)])
+    result_capacity: ClassVar[int] = 64
+    """每个命令的解析结果去重存储的容量"""
+    result_ttl: ClassVar[float] = 30.0
+    """解析结果在去重存储中的存活时间 (秒)"""
+    pipeline: ClassVar[Pipeline]
+    """解析前流水线, 可通过 `AlconnaDispatcher.pipeline.stage(name, cost)` 加入自定义阶段"""
+    render_types: ClassVar[FrozenSet[str]] = frozenset({"help"})
+    """可复用渲染结果的输出类型; 同一请求的这些输出将直接取自渲染缓存, 不再重新解析与转换"""
+    output_sender: ClassVar[Optional[OutputSender]] = None
+    """输出信息的发送队列, 默认为 None, 即在调度器内直接发送; 通过 `configure_sender` 开启"""
+
+    @classmethod
+    def configure_result_cache(cls, capacity: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        配置解析结果去重存储, 同时作用于已存在的存储
+
+        Args:
+            capacity (int, optional): 每个命令的存储容量; 尚未完成的结果不计入淘汰
+            ttl (float, optional): 已完成的结果的存活时间 (秒)
+        """
+        if capacity is not None:
+            cls.result_capacity = capacity
+        if ttl is not None:
+            cls.result_ttl = ttl
+        for store in result_cache.values():
+            store.configure(capacity, ttl)
+
+    @classmethod
+    def configure_output_store(
+        cls,
+        enabled: bool = True,
+        capacity: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        """
+        开启或关闭输出信息的存储, 开启后可通过 `output_store` 按消息或用户查询最近的输出
+
+        Args:
+            enabled (bool): 是否开启
+            capacity (int, optional): 记录的消息数上限
+            ttl (float, optional): 记录的存活时间 (秒)
+        """
+        output_store.enabled = enabled
+        output_store.configure(capacity, ttl)
+        if not enabled:
+            output_store.clear()
+
+    @classmethod
+    def configure_sender(cls, config: Optional[SendConfig] = None, enabled: bool = True):
+        """
+        开启并配置输出信息的发送队列
+
+        Args:
+            config (SendConfig, optional): 队列容量、合并窗口、速率限制与溢出策略
+            enabled (bool): 是否经由队列发送; 关闭后 (默认状态) 输出信息在调度器内直接发送
+        """
+        if not enabled:
+            cls.output_sender = None
+        elif cls.output_sender is None:
+            cls.output_sender = OutputSender(config)
+        elif config is not None:
+            cls.output_sender.configure(config)
 
     @staticmethod
     def is_tome(message: MessageChain, account: Selector):
@@ -114,50 +230,80 @@ class AlconnaDispatcher(BaseDispatcher):
     async def reply_merge(self, message: MessageChain, source: MessageReceived):
         if not source.message.reply:
             return message
-        source_id = f"{source.message.id}@{source.context.account.route}"
-        if not (origin := reply_cache.get(source_id)):
-            try:
-                origin = await source.context.pull(Message, source.message.reply)
-            except (NotImplementedError, UnknownTarget, RuntimeError, ActionFailed):
-                return message
-            else:
-                reply_cache[source_id] = origin
+        origin = await reply_cache.fetch(
+            source.context.account.route,
+            source.message.reply,
+            lambda: source.context.pull(Message, source.message.reply),  # type: ignore
+            (NotImplementedError, UnknownTarget, RuntimeError, ActionFailed),
+        )
+        if origin is None:
+            return message
         if self.merge_reply is True or self.merge_reply == "right":
             return message.extend(origin.content, copy=True)
         return origin.content.extend(message, copy=True)
 
-    def completion_waiter(self, source: MessageReceived, priority: int = 15) -> Waiter:
+    def completion_waiter(
+        self,
+        source: MessageReceived,
+        priority: int = 15,
+        session: Optional[CompSession] = None,
+    ) -> Waiter:
+        """
+        生成等待该用户下一条消息的 Waiter
+
+        未传入 session 时沿用该用户正在进行的补全会话; 没有时使用一个独立的会话, 不放入会话池, 以免无人释放而占用池的容量
+        """
+        key = session_key(source)
+        handler = self.completion_handler(session or self._sessions.get(key) or CompSession(self.command))
+
         @Waiter.create_using_function(
             [MessageReceived],
             block_propagation=True,
             priority=priority,
         )
         async def waiter(event: MessageReceived):
-            if event.context.client == source.context.client:
-                msg = event.message.content
-                if self.is_tome(msg, event.context.self):
-                    msg = self.tome_remove(msg, event.context.self)
-                return await self._waiter(msg)
+            if session_key(event) == key:
+                return await handler(event)
 
         return waiter  # type: ignore
 
+    def completion_handler(self, session: CompSession) -> Callable[[MessageReceived], Awaitable[Any]]:
+        """生成补全会话的消息处理函数, 供 CompletionInterrupt 使用"""
+
+        async def handler(event: MessageReceived):
+            msg = event.message.content
+            if self.is_tome(msg, event.context.self):
+                msg = self.tome_remove(msg, event.context.self)
+            return await self._waiter(session, msg)
+
+        return handler
+
     async def send(
         self,
         output_type: str,
         output_text: Optional[str],
         source: MessageReceived,
+        render: Optional[RenderEntry[MessageChain]] = None,
     ) -> None:
         ctx: Context = source.context
-        help_message: MessageChain = await run_always_await(
-            self.converter,
-            output_type,
-            output_text,
-        )
-        await ctx.scene.send_message(help_message)
+        if render is not None and (cached := render.renders.get(self.converter)) is not None:
+            help_message = MessageChain(cached.content.copy())
+        else:
+            help_message: MessageChain = await run_always_await(
+                self.converter,
+                output_type,
+                output_text,
+            )
+            if render is not None:
+                render.renders[self.converter] = MessageChain(help_message.content.copy())
+        if (sender := self.output_sender) is None:
+            await ctx.scene.send_message(help_message)
+        else:
+            sender.submit(ctx, help_message)
 
     def __init__(
         self,
-        command: Alconna,
+        command: Union[Alconna, LazyCommand],
         *,
         send_flag: Literal["reply", "post", "stay"] = "reply",
         skip_for_unmatch: bool = True,
@@ -166,11 +312,15 @@ class AlconnaDispatcher(BaseDispatcher):
         need_tome: bool = False,
         remove_tome: bool = False,
         merge_reply: Union[bool, Literal["left", "right"]] = False,
+        parse_executor: Optional[Executor] = None,
+        parse_budget: Optional[BudgetConfig] = None,
+        exclusive: Optional[str] = None,
+        exclusive_order: int = 0,
     ):
         """
         构造 Alconna调度器
         Args:
-            command (Alconna): Alconna实例
+            command (Alconna | LazyCommand): Alconna实例, 或延迟构建的命令
             send_flag ("reply" | "post" | "stay"): 输出信息的发送方式
             skip_for_unmatch (bool): 当指令匹配失败时是否跳过对应的事件监听器, 默认为 True
             comp_session (CompConfig, optional): 补全会话配置, 不传入则不启用补全会话
@@ -178,21 +328,41 @@ class AlconnaDispatcher(BaseDispatcher):
             need_tome (bool, optional): 是否需要 @自己, 默认为 False
             remove_tome (bool, optional): 是否移除首部的 @自己，默认为 False
             merge_reply (bool | "left" | "right", optional): 是否将引用的原消息合并到指令内
+            parse_executor (Executor, optional): 用于解析的线程池或进程池, 不传入则在事件循环内解析; 启用补全会话时不生效
+            parse_budget (BudgetConfig, optional): 解析预算, 超出预算的输入将以 "overload" 类型的输出被拒绝
+            exclusive (str, optional): 所属的互斥组名称, 组内一旦有命令匹配, 其余命令不再解析
+            exclusive_order (int): 在互斥组内的顺序, 越小越先解析; 相同时按加入的先后
         """
         super().__init__()
         self.need_tome = need_tome
-        self.command = command
         self.send_flag = send_flag
         self.skip_for_unmatch = skip_for_unmatch
         self.comp_session = comp_session
         self.converter = message_converter or self.__class__.default_send_handler
         self.remove_tome = remove_tome
         self.merge_reply = merge_reply
-        self._interface = CompSession(self.command)
-        result_cache.setdefault(command._hash, LRU(10))
-        output_cache.setdefault(command._hash, LRU(10))
-        self._comp_help = ""
-        self._waiter = lambda _: _
+        self.parse_executor = parse_executor
+        self.budget = ParseBudget(parse_budget) if parse_budget else None
+        self.router: Optional[CommandRouter] = None
+        self.exclusive: Optional[ExclusiveGroup] = None
+        if exclusive is not None:
+            ExclusiveGroup.of(exclusive).join(self, exclusive_order)
+        self._duplication: Optional[Tuple[int, Type[Duplication]]] = None
+        self._injections: Dict[Tuple[str, Any, Any], Callable[[CommandResult], Any]] = {}
+        self._sessions = CompletionPool(
+            None,
+            (comp_session or {}).get("max_sessions", 256),
+            (comp_session or {}).get("timeout", 60),
+        )
+        self._command: Optional[Alconna] = None
+        self.lazy: Optional[LazyCommand] = None
+        if isinstance(command, LazyCommand):
+            self.lazy = command
+            command.then(self._bind)
+        else:
+            self._bind(command)
+        self._comp_hint: Optional[Tuple[str, str, str, FrozenSet[str]]] = None
+        self._waiter = lambda _, x: x
         if self.comp_session is not None:
             _tab = self.comp_session.get("tab") or ".tab"
             _enter = self.comp_session.get("enter") or ".enter"
@@ -204,15 +374,9 @@ class AlconnaDispatcher(BaseDispatcher):
                 hide_tabs = True
                 hides = {"tab", "enter", "exit"}
             hides |= disables
-            if len(hides) < 3:
-                template = f"\n\n{{}}{{}}{{}}{Lang.completion.avilla.other()}\n"
-                self._comp_help = template.format(
-                    (Lang.completion.avilla.tab(cmd=_tab) + "\n") if "tab" not in hides else "",
-                    (Lang.completion.avilla.enter(cmd=_enter) + "\n") if "enter" not in hides else "",
-                    (Lang.completion.avilla.exit(cmd=_exit) + "\n") if "exit" not in hides else "",
-                )
+            self._comp_hint = (_tab, _enter, _exit, frozenset(hides))
 
-            async def _(message: MessageChain):
+            async def _(session: CompSession, message: MessageChain):
                 msg = str(message).lstrip()
                 if msg.startswith(_exit) and "exit" not in disables:
                     if msg == _exit:
@@ -231,8 +395,8 @@ class AlconnaDispatcher(BaseDispatcher):
                     except ValueError:
                         return lang.require("analyser", "param_unmatched").format(target=offset)
                     else:
-                        self._interface.tab(offset)
-                        return f"* {self._interface.current()}" if hide_tabs else "\n".join(self._interface.lines())
+                        session.tab(offset)
+                        return f"* {session.current()}" if hide_tabs else "\n".join(session.lines())
                 else:
                     return message
 
@@ -241,40 +405,86 @@ class AlconnaDispatcher(BaseDispatcher):
             self.need_tome = self.need_tome
             self.remove_tome = self.remove_tome
 
+    def _bind(self, command: Alconna):
+        self._command = command
+        self._sessions.command = command
+        self.partition = command._hash
+        """缓存分区的键, 即创建时的命令哈希"""
+        get_result_store(command)
+
+    @property
+    def command(self) -> Alconna:
+        """调度器的命令; 延迟构建的命令在首次访问时构建"""
+        if self._command is None:
+            self.lazy.build()  # type: ignore
+        return self._command  # type: ignore
+
+    @command.setter
+    def command(self, value: Alconna):
+        self._bind(value)
+
+    @property
+    def ready(self) -> bool:
+        """命令是否已构建"""
+        return self._command is not None
+
+    @property
+    def _comp_help(self) -> str:
+        """补全会话提示末尾的操作说明, 随当前语言变化"""
+        return completion_help(*self._comp_hint) if self._comp_hint else ""
+
+    def release(self):
+        """释放调度器自身持有的补全会话与超限记录, 结束等待中的补全, 并退出命令路由与互斥组"""
+        CompletionInterrupt.cancel_all(self)
+        self._sessions.clear()
+        if self.budget:
+            self.budget.forgive()
+        if self.exclusive:
+            self.exclusive.leave(self)
+        if self.router:
+            self.router.remove(self)
+            self.router = None
+
     async def handle(self, source: Optional[MessageReceived], msg: MessageChain, dii: DispatcherInterface[TSource]):
-        inc = it(InterruptControl)
         if self.comp_session is None or not source:
-            return self.command.parse(msg)  # type: ignore
+            return await parse_guarded(self.command, lambda: self.command.parse(msg))  # type: ignore
         res = None
-        with self._interface:
-            res = self.command.parse(msg)  # type: ignore
+        key = session_key(source)
+        session = self._sessions.acquire(key)
+        with activate(session):
+            res = await parse_guarded(self.command, lambda: self.command.parse(msg))  # type: ignore
         if res:
+            self._sessions.release(key, session)
             return res
         res = Arparma(self.command.path, msg, False, error_info=SpecialOptionTriggered("completion"))
-        waiter = self.completion_waiter(source, self.comp_session.get("priority", 10))
-        while self._interface.available:
-            await self.send("completion", f"{str(self._interface)}{self._comp_help}", source)
-            while True:
-                try:
-                    ans = await inc.wait(waiter, timeout=self.comp_session.get("timeout", 60))
-                except asyncio.TimeoutError:
-                    await self.output(dii, res, Lang.completion.avilla.timeout(), source)
-                    self._interface.exit()
-                    return res
-                if ans is False:
-                    await self.output(dii, res, Lang.completion.avilla.exited(), source)
-                    self._interface.exit()
-                    return res
-                if isinstance(ans, str):
-                    await self.output(dii, res, ans, source)
-                    continue
-                _res = self._interface.enter(None if ans is True else ans)
-                if _res.result:
-                    res = _res.result
-                elif _res.exception and not isinstance(_res.exception, SpecialOptionTriggered):
-                    await self.output(dii, res, str(_res.exception), source)
-                break
-        self._interface.exit()
+        inc = CompletionInterrupt.of(dii.broadcast)
+        handler = self.completion_handler(session)
+        priority = self.comp_session.get("priority", 10)
+        try:
+            while session.available:
+                await self.send("completion", f"{str(session)}{self._comp_help}", source)
+                while True:
+                    try:
+                        ans = await inc.wait(key, handler, priority, self.comp_session.get("timeout", 60), self)
+                    except asyncio.TimeoutError:
+                        await self.output(dii, res, texts.item(Lang.completion.avilla.timeout), source)
+                        return res
+                    self._sessions.touch(key)
+                    if ans is False:
+                        await self.output(dii, res, texts.item(Lang.completion.avilla.exited), source)
+                        return res
+                    if isinstance(ans, str):
+                        await self.output(dii, res, ans, source)
+                        continue
+                    with activate(session):
+                        _res = await parse_guarded(self.command, lambda: session.enter(None if ans is True else ans))
+                    if _res.result:
+                        res = _res.result
+                    elif _res.exception and not isinstance(_res.exception, SpecialOptionTriggered):
+                        await self.output(dii, res, str(_res.exception), source)
+                    break
+        finally:
+            self._sessions.release(key, session)
         return res
 
     async def output(
@@ -290,45 +500,226 @@ class AlconnaDispatcher(BaseDispatcher):
         if self.send_flag == "stay":
             return CommandResult(result, otype, output_text, source)
         if self.send_flag == "reply":
-            await self.send(otype, output_text, source)
+            render = None
+            if otype in self.render_types and (request := self.render_request(result.origin)) is not None:
+                render = render_cache.peek(self.command._hash, texts.sync(), otype, request)
+            await self.send(otype, output_text, source, render)
         elif self.send_flag == "post":
             dii.broadcast.postEvent(AlconnaOutputMessage(self.command, otype, output_text, source), source)
         return CommandResult(result, otype, None, source)
 
+    def check_offender(self, state: PipelineState):
+        """阶段: 忽略因多次超出解析预算而处于冷却中的用户"""
+        if self.budget and self.budget.blocked(offender_key(state.event)):
+            raise ExecutionStop
+
+    def check_tome(self, state: PipelineState):
+        """阶段: 判断消息是否 @自己, 并按需移除首部的 @自己"""
+        cache = source_cache.partition(state.event, state.source_id)
+        if (res := cache.get(("tome", self.remove_tome))) is None:
+            message = state.message
+            is_tome = self.is_tome(message, state.event.context.self)
+            if is_tome and self.remove_tome:
+                message = self.tome_remove(message, state.event.context.self)
+            res = cache.setdefault(("tome", self.remove_tome), (is_tome, message))
+        state.is_tome, state.message = res
+        if self.need_tome and not state.is_tome:
+            raise ExecutionStop
+
+    def check_header(self, state: PipelineState):
+        """阶段: 以命令路由预筛命令头"""
+        if not self.router:
+            return
+        if self.merge_reply == "left" and state.event.message.reply:
+            # 引用消息将被合并至首部, 待引用解析后再行判断
+            return
+        if not self.router.accept(self, state.message, state.source_id):
+            raise ExecutionStop
+
+    async def resolve_reply(self, state: PipelineState):
+        """阶段: 拉取引用消息并合并至指令内"""
+        merge = "right" if self.merge_reply is True else self.merge_reply
+        if not merge or not state.event.message.reply:
+            return
+        cache = source_cache.partition(state.event, state.source_id)
+        if (message := cache.get(("reply", merge, self.remove_tome))) is None:
+            message = await self.reply_merge(state.message, state.event)
+            message = cache.setdefault(("reply", merge, self.remove_tome), (state.is_tome, message))[1]
+        else:
+            message = message[1]
+        state.message = message
+        if merge == "left" and self.router and not self.router.accept(self, message, state.source_id):
+            raise ExecutionStop
+
+    async def prepare(self, interface: DispatcherInterface[MessageReceived]) -> PipelineState:
+        """执行解析前流水线, 被拒绝的消息将抛出 ExecutionStop"""
+        try:
+            event = interface.event
+        except LookupError:
+            event = None
+        if event is None:
+            raise ExecutionStop
+        state = PipelineState(event, get_source_id(event), event.message.content)
+        await self.pipeline.run(self, state)
+        BaseMessageChainArgv.share(state.message)
+        return state
+
     async def lookup_source(
         self,
         interface: DispatcherInterface[MessageReceived],
     ) -> MessageChain:
-        message = interface.event.message.content
-        if self.merge_reply:
-            message = await self.reply_merge(message, interface.event)
-        is_tome = self.is_tome(message, interface.event.context.self)
-        if self.need_tome and not is_tome:
-            raise ExecutionStop
-        if is_tome and self.remove_tome:
-            return self.tome_remove(message, interface.event.context.self)
-        return message
+        return (await self.prepare(interface)).message
+
+    def head_matched(self, source: Optional[MessageReceived], message: MessageChain) -> bool:
+        """
+        判断消息是否指向该命令, 而不解析参数
+
+        消息首部命中命令头索引时直接视为匹配; 否则 (命令头无法索引或未加入路由) 仅分析命令头.
+        分析使用参数解析器的副本, 不会干扰同一命令正在进行的解析
+        """
+        if self.router and self.router.indexed(self, message, get_source_id(source) if source else None):
+            return True
+        analyser = command_manager.require(self.command)
+        argv = copy(command_manager.resolve(self.command))
+        argv.message_cache = False
+        try:
+            argv.build(message)
+            analyser.header_handler(analyser.command_header, argv)
+        except (InvalidParam, FuzzyMatchSuccess, NullMessage, RuntimeError):
+            return False
+        return True
+
+    def overload(self, source: Optional[MessageReceived], message: MessageChain) -> Tuple[Arparma, Optional[str]]:
+        """
+        构造超出解析预算时的结果
+
+        仅当消息指向该命令 (命令头匹配) 时才记录超限并给出提示; 否则该结果将被直接忽略
+        """
+        head = self.head_matched(source, message)
+        if head and self.budget and source:
+            self.budget.strike(offender_key(source))
+        res = Arparma(
+            self.command.path,
+            message,
+            False,
+            HeadResult(matched=head),
+            error_info=SpecialOptionTriggered("overload"),
+        )
+        return res, (texts.item(Lang.avilla.overload) if head else None)
+
+    def render_request(self, message: MessageChain) -> Optional[str]:
+        """渲染缓存中请求的键: 仅由文本组成的消息折叠空白后的内容; 使用补全会话或含有其他元素时不缓存"""
+        if self.comp_session is not None or not all(isinstance(elem, Text) for elem in message.content):
+            return
+        return " ".join(str(message).split())
+
+    def shortcut_stamp(self) -> Hashable:
+        """命令当前快捷指令的版本戳"""
+        try:
+            shortcuts = command_manager.get_shortcut(self.command)
+        except ValueError:
+            return ()
+        return tuple((key, id(value)) for key, value in shortcuts.items())
+
+    async def parse(
+        self,
+        source: Optional[MessageReceived],
+        message: MessageChain,
+        interface: DispatcherInterface[MessageReceived],
+    ) -> Tuple[Arparma, Optional[str]]:
+        """解析消息, 返回解析结果与解析期间捕获的输出信息; 可复用的输出直接取自渲染缓存"""
+        if self.budget and self.budget.exceeded(message):
+            return self.overload(source, message)
+        request = self.render_request(message) if self.render_types else None
+        locale = texts.sync() if request is not None else ""
+        if request is not None and (
+            entry := render_cache.get(self.command._hash, locale, self.render_types, request, self.shortcut_stamp)
+        ):
+            res = Arparma(self.command.path, message, False, entry.head, error_info=SpecialOptionTriggered(entry.otype))
+            return res, entry.text
+        if self.parse_executor is not None and self.comp_session is None:
+            max_time = self.budget.max_time if self.budget else None
+            try:
+                res, output = await parse_in_executor(self.parse_executor, self.command, message, max_time)
+            except asyncio.TimeoutError:
+                return self.overload(source, message)
+        else:
+            with capture(self.command) as cap:
+                try:
+                    res = await self.handle(source, message, interface)
+                except ExecutionStop:
+                    raise
+                except Exception as e:
+                    res = Arparma(self.command.path, message, False, error_info=e)
+                output = cap.get("output", None)
+        if output and isinstance(res.error_info, SpecialOptionTriggered):
+            otype = str(res.error_info)
+            if otype == "shortcut":
+                render_cache.invalidate(self.command._hash)
+            elif request is not None and otype in self.render_types:
+                render_cache.set(
+                    self.command._hash, locale, otype, request, output, res.header_match, self.shortcut_stamp()
+                )
+        return res, output
+
+    @staticmethod
+    def outcome(result: Arparma) -> str:
+        """解析结果的分类, 用于指标统计"""
+        if not result.head_matched:
+            return "miss"
+        if result.matched:
+            return "match"
+        if isinstance(result.error_info, SpecialOptionTriggered):
+            return str(result.error_info)
+        return "error"
 
     async def beforeExecution(self, interface: DispatcherInterface[MessageReceived]):
-        message = await self.lookup_source(interface)
+        if (group := self.exclusive) is None:
+            return await self.dispatch(interface)
         try:
-            source = interface.event
+            event = interface.event
         except LookupError:
-            source = None
-        source_id = f"{source.message.id}@{source.context.account.route}" if source else "_"
+            event = None
+        if event is None:
+            raise ExecutionStop
+        turn = group.enter(self, get_source_id(event))
+        claimed = False
+        try:
+            await self.dispatch(interface, turn)
+            claimed = True
+        finally:
+            group.done(self, turn, claimed)
+
+    async def dispatch(self, interface: DispatcherInterface[MessageReceived], turn: Optional[Turn] = None):
+        """解析消息并准备注入的结果; 处于互斥组内时, 需等待组内排在前面的命令作出决定"""
+        started = perf_counter() if metrics.enabled else 0.0
+        try:
+            state = await self.prepare(interface)
+        finally:
+            # 延迟构建的命令在通过预筛之前不予构建
+            if self.ready and (rec := metrics.get(self.command)):
+                rec.lookup_time.observe(perf_counter() - started)
+        if turn is not None and self.exclusive and not await self.exclusive.wait(self, turn):
+            raise ExecutionStop
+        rec = metrics.get(self.command)
+        source, source_id, message = state.event, state.source_id, state.message
+        routes = route_tables.get(self.command._hash)
+        if routes and routes.allows(self, source_id) is False:
+            raise ExecutionStop
         if future := get_future(self.command, source_id):
             await future
             if not (_property := future.result()):
                 raise ExecutionStop
         else:
             fut = set_future(self.command, source_id)
-            with output_manager.capture(self.command.name) as cap:
-                output_manager.set_action(lambda x: x, self.command.name)
-                try:
-                    _res = await self.handle(source, message, interface)
-                except Exception as e:
-                    _res = Arparma(self.command.path, message, False, error_info=e)
-                may_help_text: Optional[str] = cap.get("output", None)
+            started = perf_counter() if rec else 0.0
+            try:
+                _res, may_help_text = await self.parse(source, message, interface)
+            except BaseException:
+                fut.set_result(None)
+                raise
+            if rec:
+                rec.record(self.outcome(_res), perf_counter() - started)
             if not _res.head_matched:
                 fut.set_result(None)
                 raise ExecutionStop
@@ -337,59 +728,137 @@ class AlconnaDispatcher(BaseDispatcher):
                 raise ExecutionStop
             if not may_help_text and _res.error_info:
                 may_help_text = repr(_res.error_info)
-            if may_help_text is not None:
-                output_cache[self.command._hash][source_id] = may_help_text
-            _property = await self.output(interface, _res, may_help_text, source)
+            if may_help_text is not None and output_store.enabled:
+                output_store.add(
+                    self.command.path,
+                    str(_res.error_info) if isinstance(_res.error_info, SpecialOptionTriggered) else "error",
+                    may_help_text,
+                    source_id,
+                    source.context.client,
+                )
+            started = perf_counter() if rec else 0.0
+            try:
+                _property = await self.output(interface, _res, may_help_text, source)
+            except BaseException:
+                fut.set_result(None)
+                raise
+            finally:
+                if rec:
+                    rec.output_time.observe(perf_counter() - started)
+            if routes := route_tables.get(self.command._hash):
+                routes.select(source_id, _property.result)
             fut.set_result(_property)
         if not _property.result.matched and not _property.output:
             raise ExecutionStop
+        if routes and (allowed := routes.allows(self, source_id)) is not None:
+            if not allowed:
+                raise ExecutionStop
+            interface.local_storage["alconna_routed"] = self in routes.routes
         interface.local_storage["alconna_result"] = _property
         return
 
+    @property
+    def duplication(self) -> Type[Duplication]:
+        """当前命令对应的 Duplication 类型, 在命令变更前保持缓存"""
+        if self._duplication is None or self._duplication[0] != self.command._hash:
+            self._duplication = (self.command._hash, generate_duplication(self.command))
+        return self._duplication[1]
+
+    def compile_injection(self, name: str, annotation: Any, default: Any) -> Callable[[CommandResult], Any]:
+        """
+        依据监听器参数的名称、类型与默认值, 编译出对应的注入函数
+
+        Args:
+            name (str): 参数名称
+            annotation (Any): 参数类型
+            default (Any): 参数默认值
+        """
+        if annotation is Duplication:
+            return lambda res: self.duplication(res.result)
+        if generic_issubclass(Duplication, annotation):
+            return lambda res: annotation(res.result)
+        if generic_issubclass(get_origin(annotation), CommandResult):
+            return lambda res: res
+        if annotation is ArgsStub:
+
+            def _args(res: CommandResult):
+                arg = ArgsStub(self.command.args)
+                arg.set_result(res.result.all_matched_args)
+                return arg
+
+            return _args
+        if annotation is OptionStub:
+            return lambda res: self.duplication(res.result).option(name)
+        if annotation is SubcommandStub:
+            return lambda res: self.duplication(res.result).subcommand(name)
+        if generic_issubclass(get_origin(annotation), Arparma):
+            return lambda res: res.result
+        if annotation is str and name == "output":
+            return lambda res: res.output
+        if generic_issubclass(annotation, Alconna):
+            return lambda res: self.command
+        if annotation is Header:
+            return lambda res: Header(res.result.header, bool(res.result.header))
+        if annotation is Match:
+
+            def _match(res: CommandResult):
+                r = res.result.all_matched_args.get(name, Empty)
+                return Match(r, r != Empty)
+
+            return _match
+        if get_origin(annotation) is Match:
+            target = get_args(annotation)[0]
+
+            def _match_generic(res: CommandResult):
+                r = res.result.all_matched_args.get(name, Empty)
+                return Match(r, generic_isinstance(r, target))
+
+            return _match_generic
+        if isinstance(default, Query):
+            if annotation is Query:
+                check = lambda result: result != Empty  # noqa: E731
+            elif get_origin(annotation) is Query:
+                _target = get_args(annotation)[0]
+                check = lambda result: generic_isinstance(result, _target)  # noqa: E731
+            else:
+                check = lambda _: False  # noqa: E731
+
+            def _query(res: CommandResult):
+                q = Query(default.path, default.result)
+                result = res.result.query(q.path, Empty)
+                q.available = check(result)
+                if q.available:
+                    q.result = result
+                elif default.result != Empty:
+                    q.available = True
+                return q
+
+            return _query
+
+        def _fallback(res: CommandResult):
+            if name in res.result.all_matched_args:
+                if generic_isinstance(res.result.all_matched_args[name], annotation):
+                    return res.result.all_matched_args[name]
+                return
+
+        return _fallback
+
     async def catch(self, interface: DispatcherInterface):
         res: CommandResult = interface.local_storage["alconna_result"]
-        default_duplication = generate_duplication(self.command)(res.result)
-        if interface.annotation is Duplication:
-            return default_duplication
-        if generic_issubclass(Duplication, interface.annotation):
-            return interface.annotation(res.result)
-        if generic_issubclass(get_origin(interface.annotation), CommandResult):
-            return res
-        if interface.annotation is ArgsStub:
-            arg = ArgsStub(self.command.args)
-            arg.set_result(res.result.all_matched_args)
-            return arg
-        if interface.annotation is OptionStub:
-            return default_duplication.option(interface.name)
-        if interface.annotation is SubcommandStub:
-            return default_duplication.subcommand(interface.name)
-        if generic_issubclass(get_origin(interface.annotation), Arparma):
-            return res.result
-        if interface.annotation is str and interface.name == "output":
-            return res.output
-        if generic_issubclass(interface.annotation, Alconna):
-            return self.command
-        if interface.annotation is Header:
-            return Header(res.result.header, bool(res.result.header))
-        if interface.annotation is Match:
-            r = res.result.all_matched_args.get(interface.name, Empty)
-            return Match(r, r != Empty)
-        if get_origin(interface.annotation) is Match:
-            r = res.result.all_matched_args.get(interface.name, Empty)
-            return Match(r, generic_isinstance(r, get_args(interface.annotation)[0]))
-        if isinstance(interface.default, Query):
-            q = Query(interface.default.path, interface.default.result)
-            result = res.result.query(q.path, Empty)
-            if interface.annotation is Query:
-                q.available = result != Empty
-            elif get_origin(interface.annotation) is Query:
-                q.available = generic_isinstance(result, get_args(interface.annotation)[0])
-            if q.available:
-                q.result = result
-            elif interface.default.result != Empty:
-                q.available = True
-            return q
-        if interface.name in res.result.all_matched_args:
-            if generic_isinstance(res.result.all_matched_args[interface.name], interface.annotation):
-                return res.result.all_matched_args[interface.name]
-            return
+        key = (interface.name, interface.annotation, interface.default)
+        try:
+            if (plan := self._injections.get(key)) is None:
+                plan = self._injections[key] = self.compile_injection(*key)
+        except TypeError:
+            plan = self.compile_injection(*key)
+        return plan(res)
+
+
+AlconnaDispatcher.pipeline = Pipeline(
+    [
+        Stage("offender", 0, AlconnaDispatcher.check_offender),
+        Stage("tome", 10, AlconnaDispatcher.check_tome),
+        Stage("header", 20, AlconnaDispatcher.check_header),
+        Stage("reply", 50, AlconnaDispatcher.resolve_reply),
+    ]
+)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import weakref
+from typing import TYPE_CHECKING, ClassVar, Optional
+
+from tarina import LRU
+
+if TYPE_CHECKING:
+    from .dispatcher import AlconnaDispatcher
+
+
+class Turn:
+    """一次事件在互斥组内的裁决状态"""
+
+    __slots__ = ("pending", "winner")
+
+    def __init__(self):
+        self.pending: dict[AlconnaDispatcher, asyncio.Future[bool]] = {}
+        self.winner: Optional[AlconnaDispatcher] = None
+
+    def allows(self, dispatcher: AlconnaDispatcher) -> bool:
+        """
+        判断该调度器是否可在此次事件中继续解析, 即尚无命令胜出, 或与胜出的调度器共享同一命令
+
+        尚未构建的命令不可能是胜出的命令, 因此比较时不会构建延迟命令
+        """
+        if (winner := self.winner) is None or winner is dispatcher:
+            return True
+        return dispatcher.ready and winner.ready and winner.command is dispatcher.command
+
+
+class ExclusiveGroup:
+    """
+    互斥命令组
+
+    同一事件中, 组内的调度器按顺序 (order 从小到大, 相同时按加入的先后) 依次决定是否处理该事件;
+    一旦某个命令匹配或产生输出, 组内其余命令不再解析. 同一命令的多个调度器视为一体
+
+    组内成员在进入 beforeExecution 时登记, 并让出一次事件循环以等待同一优先级的其他成员登记;
+    因此监听器中位于 AlconnaDispatcher 之前的调度器不应挂起
+    """
+
+    groups: ClassVar[dict[str, ExclusiveGroup]] = {}
+
+    def __init__(self, name: str, size: int = 256):
+        self.name = name
+        self.members: weakref.WeakKeyDictionary[AlconnaDispatcher, tuple[int, int]] = weakref.WeakKeyDictionary()
+        self.turns: LRU[str, Turn] = LRU(size)
+        self._count = itertools.count()
+
+    @classmethod
+    def of(cls, name: str) -> ExclusiveGroup:
+        if (group := cls.groups.get(name)) is None:
+            group = cls.groups[name] = cls(name)
+        return group
+
+    def join(self, dispatcher: AlconnaDispatcher, order: int = 0):
+        """加入互斥组, 已加入的调度器保持原有的顺序"""
+        if dispatcher not in self.members:
+            self.members[dispatcher] = (order, next(self._count))
+        dispatcher.exclusive = self
+
+    def leave(self, dispatcher: AlconnaDispatcher):
+        self.members.pop(dispatcher, None)
+        if dispatcher.exclusive is self:
+            dispatcher.exclusive = None
+
+    def enter(self, dispatcher: AlconnaDispatcher, source_id: str) -> Turn:
+        """登记参与该事件的裁决"""
+        if (turn := self.turns.get(source_id, None)) is None:
+            turn = self.turns[source_id] = Turn()
+        turn.pending[dispatcher] = asyncio.get_running_loop().create_future()
+        return turn
+
+    async def wait(self, dispatcher: AlconnaDispatcher, turn: Turn) -> bool:
+        """等待排在前面的成员作出决定, 返回该调度器是否应继续解析"""
+        await asyncio.sleep(0)
+        rank = self.members.get(dispatcher)
+        for other, fut in list(turn.pending.items()):
+            if turn.winner is not None:
+                break
+            if other is not dispatcher and rank is not None and (self.members.get(other) or rank) < rank:
+                await fut
+        return turn.allows(dispatcher)
+
+    def done(self, dispatcher: AlconnaDispatcher, turn: Turn, claimed: bool):
+        """记录该调度器的决定"""
+        if claimed and turn.winner is None:
+            turn.winner = dispatcher
+        if (fut := turn.pending.get(dispatcher)) and not fut.done():
+            fut.set_result(claimed)
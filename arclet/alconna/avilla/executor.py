@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copyreg
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from arclet.alconna.core import Alconna
+from arclet.alconna.manager import command_manager
+from graia.amnesia.message import MessageChain
+
+from arclet.alconna import Arparma
+
+from .capture import capture
+
+T = TypeVar("T")
+
+_locks: dict[int, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_guards: dict[int, asyncio.Lock] = {}
+
+
+def _restore_arparma(state: dict[str, Any]) -> Arparma:
+    res = Arparma.__new__(Arparma)
+    res.__dict__.update(state)
+    return res
+
+
+def _reduce_arparma(res: Arparma):
+    return _restore_arparma, (dict(res.__dict__),)
+
+
+copyreg.pickle(Arparma, _reduce_arparma)  # type: ignore
+
+
+def parse_lock(command: Alconna) -> threading.Lock:
+    """命令的解析锁; 命令的解析器不可重入, 无论在事件循环内还是执行器中解析都须持有此锁"""
+    if (lock := _locks.get(id(command))) is None:
+        with _locks_guard:
+            lock = _locks.setdefault(id(command), threading.Lock())
+    return lock
+
+
+def parse_guard(command: Alconna) -> asyncio.Lock:
+    """
+    命令在事件循环一侧的提交锁
+
+    同一命令的执行器任务逐个提交, 排队发生在事件循环内, 而不是占用执行器的工作线程等待解析锁
+    """
+    if (guard := _guards.get(id(command))) is None:
+        guard = _guards[id(command)] = asyncio.Lock()
+    return guard
+
+
+def release_lock(command: Alconna):
+    """移除命令的解析锁与提交锁, 在命令被释放时调用"""
+    with _locks_guard:
+        _locks.pop(id(command), None)
+    _guards.pop(id(command), None)
+
+
+async def parse_guarded(command: Alconna, func: Callable[[], T]) -> T:
+    """
+    在事件循环内持有命令的解析锁执行 func (同步的解析)
+
+    解析锁空闲时直接在事件循环内执行; 若锁正被执行器中的解析占用, 则改为在默认线程池中等待锁并执行,
+    不会阻塞事件循环. 后者经由 asyncio.to_thread 复制当前上下文, 补全会话与输出捕获照常生效
+    """
+    lock = parse_lock(command)
+    if lock.acquire(blocking=False):
+        try:
+            return func()
+        finally:
+            lock.release()
+
+    def locked() -> T:
+        with lock:
+            return func()
+
+    return await asyncio.to_thread(locked)
+
+
+def parse_with_output(
+    command: Alconna, message: MessageChain, started: Optional[Callable[[], Any]] = None
+) -> tuple[Arparma, Optional[str]]:
+    """
+    解析消息并捕获解析过程中产生的输出信息
+
+    输出信息在当前线程的上下文中捕获; 由于命令的解析器不可重入, 同一命令的解析在不同线程间互斥
+
+    Args:
+        command (Alconna): 命令
+        message (MessageChain): 待解析的消息链
+        started (Callable[[], Any], optional): 取得解析锁、即将开始解析时的回调, 用于将等待锁的时间与解析耗时分开计算
+
+    Returns:
+        tuple[Arparma, str | None]: 解析结果与输出信息
+    """
+    with parse_lock(command):
+        if started:
+            started()
+        with capture(command) as cap:
+            try:
+                res = command.parse(message)  # type: ignore
+            except Exception as e:
+                res = Arparma(command.path, message, False, error_info=e)
+            return res, cap.get("output", None)
+
+
+def parse_by_path(path: str, message: MessageChain) -> tuple[Arparma, Optional[str]]:
+    """
+    进程池内的解析入口
+
+    子进程以命令路径在 command_manager 中查找命令, 因此命令须在子进程中同样被注册
+    (使用 fork 启动方式, 或在进程池的 initializer 中导入定义命令的模块)
+    """
+    return parse_with_output(command_manager.get_command(path), message)
+
+
+async def parse_in_executor(
+    executor: Executor,
+    command: Alconna,
+    message: MessageChain,
+    timeout: Optional[float] = None,
+) -> tuple[Arparma, Optional[str]]:
+    """
+    在执行器中解析消息
+
+    线程池直接共享命令与消息对象; 进程池仅传递命令路径与消息链, 结果 Arparma 经由 pickle 传回.
+    执行器自身的异常 (如进程池损坏、子进程中找不到命令或结果无法序列化) 将作为解析失败的结果返回.
+
+    同一命令的任务经由 parse_guard 逐个提交. 超时或等待被取消时, 已开始的解析无法中断, 将继续执行至结束,
+    其结果被丢弃; 在此之前提交锁不会释放, 同一命令的后续任务在事件循环内排队, 而不会占满执行器的工作线程
+
+    Args:
+        executor (Executor): 线程池或进程池
+        command (Alconna): 命令
+        message (MessageChain): 待解析的消息链
+        timeout (float, optional): 解析的限时. 线程池中自取得解析锁起计时, 排队与等待锁的时间不计入;
+            进程池无法回报开始时间, 自提交起计时
+
+    Raises:
+        asyncio.TimeoutError: 本次解析自身超出限时
+    """
+    loop = asyncio.get_running_loop()
+    guard = parse_guard(command)
+    await guard.acquire()
+    started = loop.create_future()
+
+    def _start():
+        if not started.done():
+            started.set_result(None)
+
+    def signal():
+        with contextlib.suppress(RuntimeError):  # 事件循环已关闭
+            loop.call_soon_threadsafe(_start)
+
+    try:
+        if isinstance(executor, ProcessPoolExecutor):
+            job = loop.run_in_executor(executor, parse_by_path, command.path, message)
+            _start()
+        else:
+            job = loop.run_in_executor(executor, parse_with_output, command, message, signal)
+    except Exception as e:
+        guard.release()
+        return Arparma(command.path, message, False, error_info=e), None
+    job.add_done_callback(lambda _: guard.release())
+    try:
+        if timeout:
+            await asyncio.wait({started, job}, return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(asyncio.shield(job), timeout)
+        return await asyncio.shield(job)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        raise
+    except Exception as e:
+        return Arparma(command.path, message, False, error_info=e), None
@@ -17,5 +17,10 @@ class Completion:
     avilla = CompletionAvilla
 
 
+class Avilla:
+    overload: LangItem = LangItem("avilla", "overload")
+
+
 class Lang(LangModel):
     completion = Completion
+    avilla = Avilla
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, ClassVar, Optional
+
+from arclet.alconna.core import Alconna
+
+
+class LazyCommand:
+    """
+    延迟构建的命令
+
+    仅记录命令的构建方式, 在首次使用 (调度器首次处理消息) 或预热 (warmup) 时才构建 Alconna;
+    构建后依次调用通过 then 注册的回调
+    """
+
+    pending: ClassVar[dict[LazyCommand, None]] = {}
+    """尚未构建的命令, 按创建的先后排列"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Alconna],
+        source: str = "",
+        header: Optional[tuple[list[str], list[type]]] = None,
+    ):
+        self.factory = factory
+        self.source = source
+        """命令的描述, 如命令字符串"""
+        self.header = header
+        """构建前用于命令路由的命令头索引键 (文本前缀列表, 元素类型列表); 为 None 时构建前视为可能匹配任意消息"""
+        self.command: Optional[Alconna] = None
+        self.callbacks: list[Callable[[Alconna], Any]] = []
+        self.pending[self] = None
+
+    @property
+    def built(self) -> bool:
+        return self.command is not None
+
+    def build(self) -> Alconna:
+        """构建命令, 已构建时直接返回"""
+        if self.command is None:
+            self.command = self.factory()
+            self.pending.pop(self, None)
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback(self.command)
+        return self.command
+
+    def then(self, callback: Callable[[Alconna], Any]):
+        """注册构建后的回调, 已构建时立即调用"""
+        if self.command is not None:
+            callback(self.command)
+        else:
+            self.callbacks.append(callback)
+
+    def cancel(self):
+        """放弃构建, 不再参与预热"""
+        self.pending.pop(self, None)
+        self.callbacks.clear()
+
+    def __repr__(self):
+        return f"LazyCommand({self.source!r}, built={self.built})"
+
+
+async def warmup(batch: int = 16, interval: float = 0.0) -> int:
+    """
+    逐批构建所有尚未构建的命令, 每批之间让出事件循环; 返回构建的数量
+
+    构建失败的命令将被放弃, 其异常交由事件循环的异常处理器
+    """
+    count = 0
+    while LazyCommand.pending:
+        for lazy in list(LazyCommand.pending)[:batch]:
+            try:
+                lazy.build()
+                count += 1
+            except Exception as e:
+                lazy.cancel()
+                asyncio.get_running_loop().call_exception_handler(
+                    {"message": f"failed to build {lazy!r}", "exception": e}
+                )
+        await asyncio.sleep(interval)
+    return count
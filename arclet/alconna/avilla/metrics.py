@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Optional
+
+from arclet.alconna.core import Alconna
+from graia.broadcast.entities.dispatcher import BaseDispatcher
+from graia.broadcast.entities.event import Dispatchable
+from graia.broadcast.interfaces.dispatcher import DispatcherInterface
+
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+"""耗时直方图的桶上界 (秒), 超出最后一个上界的计入 +Inf"""
+
+
+class Histogram:
+    """固定分桶的耗时直方图"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": {**{str(bound): n for bound, n in zip(BUCKETS, self.counts)}, "+Inf": self.counts[-1]},
+        }
+
+
+class CommandMetrics:
+    """单个命令的解析计数与耗时"""
+
+    __slots__ = ("parses", "outcomes", "parse_time", "lookup_time", "output_time")
+
+    def __init__(self):
+        self.parses = 0
+        self.outcomes: dict[str, int] = {}
+        self.parse_time = Histogram()
+        self.lookup_time = Histogram()
+        self.output_time = Histogram()
+
+    def record(self, outcome: str, elapsed: float):
+        """
+        记录一次解析
+
+        Args:
+            outcome (str): 解析结果, 为 "match", "miss", "error" 或输出类型 (如 "help")
+            elapsed (float): 解析耗时 (秒)
+        """
+        self.parses += 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.parse_time.observe(elapsed)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "parses": self.parses,
+            "outcomes": dict(self.outcomes),
+            "parse_time": self.parse_time.snapshot(),
+            "lookup_time": self.lookup_time.snapshot(),
+            "output_time": self.output_time.snapshot(),
+        }
+
+
+class MetricsRegistry:
+    """
+    命令指标的注册表
+
+    默认关闭; 关闭时调度器仅需检查一次 enabled 标志
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.commands: dict[str, CommandMetrics] = {}
+
+    def get(self, command: Alconna) -> Optional[CommandMetrics]:
+        """获取命令对应的指标, 未开启时返回 None"""
+        if not self.enabled:
+            return
+        if (rec := self.commands.get(command.path)) is None:
+            rec = self.commands[command.path] = CommandMetrics()
+        return rec
+
+    def reset(self):
+        self.commands.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class AlconnaStatsReport(Dispatchable):
+    """
+    Alconna 指标报告事件
+
+    由 AlconnaBehaviour.enable_metrics 设定的间隔周期性地广播, 携带 AlconnaBehaviour.stats() 的结果
+    """
+
+    def __init__(self, stats: dict[str, Any]):
+        self.stats = stats
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: "DispatcherInterface[AlconnaStatsReport]"):
+            if interface.name == "stats" or interface.annotation is dict:
+                return interface.event.stats
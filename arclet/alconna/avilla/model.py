@@ -11,7 +11,7 @@ from arclet.alconna import Arparma, Empty
 
 TSource = TypeVar("TSource", bound=Dispatchable)
 T = TypeVar("T")
-OutType = Literal["help", "shortcut", "completion", "error"]
+OutType = Literal["help", "shortcut", "completion", "error", "overload"]
 TConvert: TypeAlias = Callable[[OutType, str], Union[MessageChain, Awaitable[MessageChain]]]
 
 
@@ -82,8 +82,35 @@ class CompConfig(TypedDict):
     enter: NotRequired[str]
     exit: NotRequired[str]
     timeout: NotRequired[int]
+    max_sessions: NotRequired[int]
     priority: NotRequired[int]
     hide_tabs: NotRequired[bool]
     hides: NotRequired[Set[Literal["tab", "enter", "exit"]]]
     disables: NotRequired[Set[Literal["tab", "enter", "exit"]]]
     lite: NotRequired[bool]
+
+
+class BudgetConfig(TypedDict):
+    max_length: NotRequired[int]
+    """消息中文本的最大总长度"""
+    max_elements: NotRequired[int]
+    """消息的最大元素数量"""
+    max_time: NotRequired[float]
+    """解析的最长耗时 (秒), 仅在使用 parse_executor 时生效"""
+    max_strikes: NotRequired[int]
+    """冷却时间内允许的超限次数, 达到后该用户的消息将被直接忽略"""
+    cooldown: NotRequired[float]
+    """超限记录的冷却时间 (秒)"""
+
+
+class SendConfig(TypedDict):
+    max_queue: NotRequired[int]
+    """每个场景排队中的输出信息的最大数量"""
+    window: NotRequired[float]
+    """合并窗口 (秒), 窗口内到达的多条输出合并为一条消息发送; 不设置则逐条发送"""
+    rate: NotRequired[float]
+    """每个场景 (与账号) 每秒最多发送的消息数, 不设置则不限速"""
+    burst: NotRequired[int]
+    """令牌桶的容量, 即允许的突发消息数"""
+    overflow: NotRequired[Literal["drop", "merge"]]
+    """队列已满时的策略: 丢弃新的输出, 或将其合并到队尾的输出中 (默认)"""
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from inspect import isawaitable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Union
+
+from avilla.standard.core.message import MessageReceived
+from graia.amnesia.message import MessageChain
+
+if TYPE_CHECKING:
+    from .dispatcher import AlconnaDispatcher
+
+
+@dataclass
+class PipelineState:
+    """解析前流水线的状态, 由各阶段逐步填充"""
+
+    event: MessageReceived
+    source_id: str
+    message: MessageChain
+    is_tome: bool = False
+    extra: dict[str, Any] = field(default_factory=dict)
+    """供自定义阶段使用的数据"""
+
+
+StageFunc = Callable[["AlconnaDispatcher", PipelineState], Union[None, Awaitable[None]]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    解析前的处理阶段
+
+    name (str): 阶段名称
+
+    cost (int): 阶段的开销, 流水线按开销从低到高执行各阶段
+
+    func (StageFunc): 处理函数, 可修改状态; 抛出 ExecutionStop 以中止后续的阶段与解析
+    """
+
+    name: str
+    cost: int
+    func: StageFunc
+
+
+class Pipeline:
+    """
+    解析前流水线
+
+    开销低的阶段 (如元素类型检查、命令头预筛) 先于开销高的阶段 (如拉取引用消息) 执行,
+    使注定无法匹配的消息尽早被拒绝
+    """
+
+    def __init__(self, stages: Iterable[Stage] = ()):
+        self.stages: list[Stage] = sorted(stages, key=lambda x: x.cost)
+
+    def add(self, stage: Stage):
+        """加入阶段, 同名阶段将被替换"""
+        self.stages = sorted([*(i for i in self.stages if i.name != stage.name), stage], key=lambda x: x.cost)
+
+    def remove(self, name: str):
+        self.stages = [i for i in self.stages if i.name != name]
+
+    def stage(self, name: str, cost: int):
+        """以装饰器的形式加入阶段"""
+
+        def wrapper(func: StageFunc) -> StageFunc:
+            self.add(Stage(name, cost, func))
+            return func
+
+        return wrapper
+
+    def copy(self) -> Pipeline:
+        return Pipeline(self.stages)
+
+    async def run(self, dispatcher: AlconnaDispatcher, state: PipelineState) -> PipelineState:
+        for stage in self.stages:
+            if isawaitable(res := stage.func(dispatcher, state)):
+                await res
+        return state
+
+    def __contains__(self, name: str):
+        return any(i.name == name for i in self.stages)
+
+    def __repr__(self):
+        return f"Pipeline({', '.join(f'{i.name}:{i.cost}' for i in self.stages)})"
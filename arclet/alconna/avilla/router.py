@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+from inspect import isclass
+from typing import TYPE_CHECKING, Any, Hashable, Optional
+
+from arclet.alconna._internal._argv import Argv
+from arclet.alconna._internal._header import handle_bracket
+from arclet.alconna.core import Alconna
+from arclet.alconna.manager import command_manager
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Element, Text
+from tarina import LRU
+
+if TYPE_CHECKING:
+    from .dispatcher import AlconnaDispatcher
+
+_REGEX_SPECIAL = set("\\.^$*+?{}[]()|")
+
+
+def _literal(pattern: str) -> str:
+    """获取正则表达式中必定出现的字面量前缀"""
+    if "|" in pattern:
+        return ""
+    for index, char in enumerate(pattern):
+        if char in _REGEX_SPECIAL:
+            if char in "*?{" and index:
+                return pattern[: index - 1]
+            return pattern[:index]
+    return pattern
+
+
+def _element_type(target: Any) -> Optional[type]:
+    if isclass(target):
+        return target if issubclass(target, Element) else None
+    return target.__class__ if isinstance(target, Element) else None
+
+
+def header_keys(command: Alconna) -> Optional[tuple[list[str], list[type]]]:
+    """
+    计算命令头的索引键
+
+    返回 (文本前缀列表, 元素类型列表); 若命令头无法被索引, 则返回 None
+    """
+    if command.meta.fuzzy_match or command.union:
+        return
+    texts: list[str] = []
+    types: list[type] = []
+    prefixes: list[Any] = command.prefixes  # type: ignore
+    if not isinstance(command.command, str):
+        if not prefixes:
+            if not (_type := _element_type(command.command)):
+                return
+            return texts, [_type]
+        for prefix in prefixes:
+            if isinstance(prefix, str):
+                texts.append(prefix)
+            elif _type := _element_type(prefix):
+                types.append(_type)
+            else:
+                return
+        return texts, types
+    if command.command.startswith("re:"):
+        name = _literal(command.command[3:])
+    else:
+        _cmd, to_regex = handle_bracket(command.command, {})
+        name = _literal(_cmd) if to_regex else _cmd
+    if not prefixes:
+        return [name], types
+    for prefix in prefixes:
+        if isinstance(prefix, str):
+            texts.append(f"{prefix}{name}")
+        elif isinstance(prefix, tuple):
+            if isinstance(prefix[0], str):
+                texts.append(f"{prefix[0]}{prefix[1]}{name}")
+            elif _type := _element_type(prefix[0]):
+                types.append(_type)
+            else:
+                return
+        elif _type := _element_type(prefix):
+            types.append(_type)
+        else:
+            return
+    return texts, types
+
+
+def leading(message: MessageChain, argv: Optional[Argv] = None) -> tuple[Any, ...]:
+    """
+    获取消息链的首部: 连续的文本内容, 或者首个非文本元素的类型
+
+    传入 argv 时按其 filter_out、preprocessors 与 to_text 处理元素, 与命令解析时看到的内容一致
+    """
+    head = []
+    if argv is None:
+        for elem in message.content:
+            if isinstance(elem, Text):
+                if elem.text.strip():
+                    head.append(elem.text)
+                continue
+            if not head:
+                head.append(elem.__class__)
+            break
+        return tuple(head)
+    for unit in message.content:
+        if (utype := unit.__class__) in argv.filter_out:
+            continue
+        if (proc := argv.preprocessors.get(utype)) and (res := proc(unit)):
+            unit = res
+        if (text := argv.to_text(unit)) is None:
+            if not head:
+                head.append(unit.__class__)
+            break
+        if text.strip():
+            head.append(text)
+    return tuple(head)
+
+
+class _Node:
+    __slots__ = ("children", "targets")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.targets: set[AlconnaDispatcher] = set()
+
+
+class CommandRouter:
+    """
+    命令路由
+
+    以所有已注册命令的命令头建立索引 (文本前缀的字典树与元素类型表),
+    使每条消息只需查找一次, 仅有可能匹配的调度器才会进行解析
+    """
+
+    def __init__(self, cache_size: int = 64):
+        self.root = _Node()
+        self.types: dict[type, set[AlconnaDispatcher]] = {}
+        self.wildcard: set[AlconnaDispatcher] = set()
+        self.ignores: set[str] = set()
+        self.entries: dict[AlconnaDispatcher, Optional[tuple[list[str], list[type]]]] = {}
+        self.argvs: dict[AlconnaDispatcher, Argv] = {}
+        self._cache: LRU[tuple[Hashable, tuple[Any, ...]], frozenset[AlconnaDispatcher]] = LRU(cache_size)
+
+    def __contains__(self, dispatcher: AlconnaDispatcher):
+        return dispatcher in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _normalize(self, text: str) -> str:
+        return "".join(char for char in text if not char.isspace() and char not in self.ignores)
+
+    def _insert(self, dispatcher: AlconnaDispatcher, keys: Optional[tuple[list[str], list[type]]]):
+        if keys is None:
+            self.wildcard.add(dispatcher)
+            return
+        texts, types = keys
+        for text in texts:
+            if not (key := self._normalize(text)):
+                self.wildcard.add(dispatcher)
+                continue
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+            node.targets.add(dispatcher)
+        for _type in types:
+            self.types.setdefault(_type, set()).add(dispatcher)
+
+    def _rebuild(self):
+        self.root = _Node()
+        self.types.clear()
+        self.wildcard.clear()
+        for dispatcher, keys in self.entries.items():
+            self._insert(dispatcher, keys)
+
+    def add(self, dispatcher: AlconnaDispatcher):
+        """将调度器加入索引"""
+        if dispatcher in self.entries:
+            return
+        if not dispatcher.ready:
+            # 延迟构建的命令在构建前按其提供的命令头索引, 未提供时视为可能匹配任意消息
+            keys = self.entries[dispatcher] = dispatcher.lazy.header  # type: ignore
+            self._insert(dispatcher, keys)
+            self._cache.clear()
+            return
+        keys = header_keys(dispatcher.command)
+        try:
+            self.argvs[dispatcher] = command_manager.resolve(dispatcher.command)
+        except ValueError:
+            keys = None
+        ignores = set()
+        for sep in dispatcher.command.separators:
+            if len(sep) != 1:
+                keys = None
+            elif not sep.isspace():
+                ignores.add(sep)
+        self.entries[dispatcher] = keys
+        if ignores - self.ignores:
+            self.ignores |= ignores
+            self._rebuild()
+        else:
+            self._insert(dispatcher, keys)
+        self._cache.clear()
+
+    def remove(self, dispatcher: AlconnaDispatcher):
+        """将调度器移出索引"""
+        if dispatcher not in self.entries:
+            return
+        del self.entries[dispatcher]
+        self.argvs.pop(dispatcher, None)
+        self._rebuild()
+        self._cache.clear()
+
+    def refresh(self, dispatcher: AlconnaDispatcher):
+        """重新索引调度器, 用于命令构建或变更之后"""
+        if dispatcher not in self.entries:
+            return
+        if self.entries[dispatcher] is None:
+            del self.entries[dispatcher]
+            self.wildcard.discard(dispatcher)
+        else:
+            self.remove(dispatcher)
+        self.add(dispatcher)
+
+    def lookup(
+        self, message: MessageChain, source: Optional[Hashable] = None, argv: Optional[Argv] = None
+    ) -> frozenset[AlconnaDispatcher]:
+        """
+        查找可能匹配该消息的调度器
+
+        Args:
+            message (MessageChain): 消息链
+            source (Hashable, optional): 消息来源标识, 用于在同一事件内复用查找结果
+            argv (Argv, optional): 用于提取消息首部的参数解析器, 不传入则只按文本元素提取
+        """
+        head = leading(message, argv)
+        if source is not None and (res := self._cache.get((source, head), None)) is not None:
+            return res
+        result = set(self.wildcard)
+        if head and head[0].__class__ is str:
+            node = self.root
+            for text in head:
+                for char in text:
+                    if char.isspace() or char in self.ignores:
+                        continue
+                    if (child := node.children.get(char)) is None:
+                        break
+                    node = child
+                    result.update(node.targets)
+                else:
+                    continue
+                break
+        elif head:
+            for _type in head[0].__mro__:
+                if _type in self.types:
+                    result.update(self.types[_type])
+        res = frozenset(result)
+        if source is not None:
+            self._cache[(source, head)] = res
+        return res
+
+    def indexed(self, dispatcher: AlconnaDispatcher, message: MessageChain, source: Optional[Hashable] = None) -> bool:
+        """判断该消息的首部是否命中调度器的命令头索引 (不含无法索引的调度器)"""
+        return dispatcher not in self.wildcard and dispatcher in self.lookup(
+            message, source, self.argvs.get(dispatcher)
+        )
+
+    def accept(self, dispatcher: AlconnaDispatcher, message: MessageChain, source: Optional[Hashable] = None) -> bool:
+        """判断调度器是否需要对该消息进行解析"""
+        if dispatcher not in self.entries or dispatcher in self.lookup(message, source, self.argvs.get(dispatcher)):
+            return True
+        if not dispatcher.ready:
+            return False
+        try:
+            return bool(command_manager.get_shortcut(dispatcher.command))
+        except ValueError:
+            return False
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING, Callable, Hashable, Iterable, Optional
+
+from arclet.alconna.core import Alconna
+from graia.broadcast import DecoratorInterface
+from graia.broadcast.builtin.decorators import Depend
+from graia.broadcast.exceptions import ExecutionStop
+from tarina import LRU
+
+from arclet.alconna import Arparma
+
+from .model import CommandResult
+
+if TYPE_CHECKING:
+    from .dispatcher import AlconnaDispatcher
+
+
+class Route(Depend):
+    """
+    可被路由表识别的解析结果条件, 由 match_path、match_value 与 assign 生成
+
+    分配到 AlconnaBehaviour 后, 条件在每次解析后由路由表统一判断一次, 不满足条件的监听器在调度器处即被跳过;
+    未分配时仍作为普通的 Depend 使用
+    """
+
+    def __init__(self, key: Hashable, predicate: Callable[[Arparma], bool]):
+        try:
+            hash(key)
+        except TypeError:
+            key = id(self)
+        self.key = key
+        self.predicate = predicate
+        super().__init__(self.check)
+
+    def check(self, result: CommandResult):
+        if self.predicate(result.result):
+            return True
+        raise ExecutionStop
+
+    async def target(self, interface: DecoratorInterface):
+        if interface.local_storage.get("alconna_routed"):
+            return True
+        if (res := interface.local_storage.get("alconna_result")) is not None:
+            return self.check(res)
+        return await super().target(interface)
+
+
+class RouteTable:
+    """
+    命令的监听器路由表
+
+    记录同一命令的各个调度器所在监听器的 Route 条件; 每次解析后对所有不同的条件各判断一次,
+    得到应当执行的调度器集合
+    """
+
+    def __init__(self, size: int = 64):
+        self.routes: weakref.WeakKeyDictionary[AlconnaDispatcher, tuple[Route, ...]] = weakref.WeakKeyDictionary()
+        self.selected: LRU[str, set[AlconnaDispatcher]] = LRU(size)
+
+    def add(self, dispatcher: AlconnaDispatcher, routes: Iterable[Route]):
+        if routes := tuple(routes):
+            self.routes[dispatcher] = routes
+            self.selected.clear()
+
+    def remove(self, dispatcher: AlconnaDispatcher):
+        self.routes.pop(dispatcher, None)
+        self.selected.clear()
+
+    def select(self, source_id: str, result: Arparma) -> set[AlconnaDispatcher]:
+        """判断各条件, 记录并返回该次解析应当执行的 (带有条件的) 调度器"""
+        checked: dict[Hashable, bool] = {}
+        selected = set()
+        for dispatcher, routes in list(self.routes.items()):
+            for route in routes:
+                if (passed := checked.get(route.key)) is None:
+                    try:
+                        passed = checked[route.key] = bool(route.predicate(result))
+                    except Exception:
+                        passed = checked[route.key] = False
+                if not passed:
+                    break
+            else:
+                selected.add(dispatcher)
+        self.selected[source_id] = selected
+        return selected
+
+    def allows(self, dispatcher: AlconnaDispatcher, source_id: str) -> Optional[bool]:
+        """该调度器是否应当执行; 无条件时恒为 True, 尚未解析时返回 None"""
+        if dispatcher not in self.routes:
+            return True
+        if (selected := self.selected.get(source_id, None)) is None:
+            return
+        return dispatcher in selected
+
+    def __bool__(self):
+        return bool(self.routes)
+
+
+route_tables: dict[int, RouteTable] = {}
+
+
+def get_route_table(alc: Alconna) -> RouteTable:
+    if (table := route_tables.get(alc._hash)) is None:
+        table = route_tables[alc._hash] = RouteTable()
+    return table
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Optional
 
 from arclet.alconna.core import Alconna
 from arclet.alconna.manager import command_manager
 from arclet.alconna.tools import AlconnaFormat
+from creart import it
 from graia.broadcast import Broadcast
 from graia.saya.behaviour import Behaviour
 from graia.saya.cube import Cube
 from graia.saya.schema import BaseSchema
 
-from .dispatcher import AlconnaDispatcher
+from .affix import prefix_matcher, suffix_matcher
+from .argv import BaseMessageChainArgv
+from .cache import retained
+from .dispatcher import (
+    AlconnaDispatcher,
+    get_result_store,
+    output_store,
+    release_partition,
+    render_cache,
+    reply_cache,
+    result_cache,
+    source_cache,
+)
+from .exclusive import ExclusiveGroup
+from .executor import release_lock
+from .lazy import warmup
+from .metrics import AlconnaStatsReport, metrics
+from .router import CommandRouter
+from .routing import Route, get_route_table, route_tables
+from .texts import texts
 
 
 @dataclass
@@ -25,6 +46,12 @@ class AlconnaSchema(BaseSchema):
     def record(self, func: Any):
         command: Alconna
         if isinstance(self.command, AlconnaDispatcher):
+            if not self.command.ready:
+                if getattr(func, "__alc_shortcuts__", None):
+                    # 快捷指令无法由命令头预筛, 构建前需解析所有消息
+                    self.command.lazy.header = None  # type: ignore
+                self.command.lazy.then(lambda _: self.record(func))  # type: ignore
+                return
             command = self.command.command
         else:
             command = self.command
@@ -38,6 +65,61 @@ class AlconnaBehaviour(Behaviour):
 
     def __init__(self, broadcast: Broadcast) -> None:
         self.broadcast = broadcast
+        self.router = CommandRouter()
+        self._allocated: dict[Any, AlconnaDispatcher] = {}
+        self._reporter: Optional[asyncio.Task] = None
+        self.exclusive: Optional[ExclusiveGroup] = None
+        self._joined: set[AlconnaDispatcher] = set()
+        self._partitions: dict[int, set[AlconnaDispatcher]] = {}
+
+    def _route(self, cube: Cube[AlconnaSchema], dispatcher: AlconnaDispatcher):
+        dispatcher.router = self.router
+        self.router.add(dispatcher)
+        self._allocated[cube.content] = dispatcher
+        if self.exclusive and dispatcher.exclusive is None:
+            self.exclusive.join(dispatcher)
+            self._joined.add(dispatcher)
+        if dispatcher.ready:
+            self._attach(cube, dispatcher)
+        else:
+            dispatcher.lazy.then(lambda _: self._attach(cube, dispatcher))  # type: ignore
+
+    def _attach(self, cube: Cube[AlconnaSchema], dispatcher: AlconnaDispatcher):
+        """登记依赖命令本身的部分: 命令头索引、缓存分区与路由表; 延迟构建的命令在构建后登记"""
+        if self._allocated.get(cube.content) is not dispatcher:
+            return
+        self.router.refresh(dispatcher)
+        self._partitions.setdefault(dispatcher.partition, set()).add(dispatcher)
+        if listener := self.broadcast.getListener(cube.content):
+            get_route_table(dispatcher.command).add(
+                dispatcher, (i for i in listener.decorators if isinstance(i, Route))
+            )
+
+    def warmup(self, batch: int = 16) -> asyncio.Task:
+        """
+        在后台逐批构建所有延迟构建的命令
+
+        Args:
+            batch (int): 每批构建的数量, 每批之间让出事件循环
+        """
+        return it(asyncio.AbstractEventLoop).create_task(warmup(batch))
+
+    def set_exclusive(self, group: Optional[str] = "default"):
+        """
+        令所有未指定互斥组的命令加入同一互斥组, 按分配的先后决定解析顺序; 传入 None 以关闭
+
+        一旦某个命令匹配, 其余命令不再解析该消息
+        """
+        for dispatcher in self._joined:
+            if dispatcher.exclusive:
+                dispatcher.exclusive.leave(dispatcher)
+        self._joined.clear()
+        self.exclusive = ExclusiveGroup.of(group) if group is not None else None
+        if self.exclusive:
+            for dispatcher in self._allocated.values():
+                if dispatcher.exclusive is None:
+                    self.exclusive.join(dispatcher)
+                    self._joined.add(dispatcher)
 
     def allocate(self, cube: Cube[AlconnaSchema]):
         if not isinstance(cube.metaclass, AlconnaSchema):
@@ -45,12 +127,14 @@ class AlconnaBehaviour(Behaviour):
         if listener := self.broadcast.getListener(cube.content):
             for dispatcher in listener.dispatchers:
                 if isinstance(dispatcher, AlconnaDispatcher):
-                    cube.metaclass.command = dispatcher.command
+                    cube.metaclass.command = dispatcher.command if dispatcher.ready else dispatcher
                     cube.metaclass.record(cube.content)
+                    self._route(cube, dispatcher)
                     return True
             if isinstance(cube.metaclass.command, AlconnaDispatcher):
                 listener.dispatchers.append(cube.metaclass.command)
                 cube.metaclass.record(cube.content)
+                self._route(cube, cube.metaclass.command)
                 return True
             return
         cube.metaclass.record(cube.content)
@@ -59,9 +143,128 @@ class AlconnaBehaviour(Behaviour):
     def release(self, cube: Cube[AlconnaSchema]):
         if not isinstance(cube.metaclass, AlconnaSchema):
             return
+        if isinstance(cube.metaclass.command, AlconnaDispatcher) and not cube.metaclass.command.ready:
+            # 尚未构建的延迟命令: 只需退出路由与互斥组, 并放弃构建
+            if dispatcher := self._allocated.pop(cube.content, None):
+                self._joined.discard(dispatcher)
+                dispatcher.release()
+            cube.metaclass.command.lazy.cancel()  # type: ignore
+            return True
         if isinstance(cube.metaclass.command, AlconnaDispatcher):
             cmd = cube.metaclass.command.command
         else:
             cmd = cube.metaclass.command
+        if dispatcher := self._allocated.pop(cube.content, None):
+            self._joined.discard(dispatcher)
+            get_route_table(dispatcher.command).remove(dispatcher)
+            dispatcher.release()
+            users = self._partitions.get(dispatcher.partition, set())
+            users.discard(dispatcher)
+            if not users:
+                self._partitions.pop(dispatcher.partition, None)
+                release_partition(dispatcher.partition)
+                output_store.forget(dispatcher.command.path)
+                release_lock(dispatcher.command)
+        elif cmd._hash not in self._partitions:
+            release_partition(cmd._hash)
         command_manager.delete(cmd)
         return True
+
+    def memory(self) -> dict[str, Any]:
+        """
+        估算各缓存持有的内存
+
+        返回各命令的解析结果、路由表与补全会话, 以及全局的输出信息存储、引用消息缓存、事件缓存与预处理缓存的条目数与字节数 (近似值)
+        """
+        commands: dict[str, Any] = {}
+        for key, dispatchers in self._partitions.items():
+            command = next(iter(dispatchers)).command
+            table = route_tables.get(key)
+            entry = commands[command.path] = {
+                "result_cache": _usage(result_cache.get(key)),
+                "routes": _usage(table.selected if table is not None else None),
+                "sessions": _usage(*(i._sessions.sessions for i in dispatchers)),
+            }
+            entry["bytes"] = sum(i["bytes"] for i in entry.values())
+        shared = {
+            "output_store": _usage(output_store.messages),
+            "reply_cache": _usage(*reply_cache.partitions.values()),
+            "render_cache": _usage(render_cache.data),
+            "texts": _usage(texts.data),
+            "source_cache": _usage(source_cache.data),
+            "argv_shared": _usage(BaseMessageChainArgv.shared),
+            "affix_memo": _usage(prefix_matcher._memo, suffix_matcher._memo),
+        }
+        return {
+            "commands": commands,
+            **shared,
+            "total": sum(i["bytes"] for i in commands.values()) + sum(i["bytes"] for i in shared.values()),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """
+        获取已分配的命令的指标
+
+        包括各命令的解析计数与耗时 (需先调用 enable_metrics), 解析结果去重存储、引用消息缓存与输出渲染缓存的命中情况;
+        尚未构建的延迟命令不会因此构建, 仅在 pending 中列出
+        """
+        commands: dict[str, Any] = {}
+        pending: list[str] = []
+        for dispatcher in self._allocated.values():
+            if not dispatcher.ready:
+                pending.append(dispatcher.lazy.source)  # type: ignore
+                continue
+            command = dispatcher.command
+            if command.path in commands:
+                continue
+            entry = metrics.commands.get(command.path)
+            commands[command.path] = {
+                **(entry.snapshot() if entry else {}),
+                "result_cache": _with_rate(get_result_store(command).stats()),
+            }
+        return {
+            "enabled": metrics.enabled,
+            "commands": commands,
+            "pending": pending,
+            "reply_cache": _with_rate(reply_cache.stats()),
+            "render_cache": _with_rate(render_cache.stats()),
+        }
+
+    def enable_metrics(self, interval: Optional[float] = None):
+        """
+        开启指标统计
+
+        Args:
+            interval (float, optional): 周期性广播 AlconnaStatsReport 事件的间隔 (秒), 不传入则不广播
+        """
+        metrics.enabled = True
+        if self._reporter:
+            self._reporter.cancel()
+            self._reporter = None
+        if interval:
+            self._reporter = it(asyncio.AbstractEventLoop).create_task(self._report(interval))
+
+    def disable_metrics(self):
+        """关闭指标统计, 已记录的指标保留至 metrics.reset()"""
+        metrics.enabled = False
+        if self._reporter:
+            self._reporter.cancel()
+            self._reporter = None
+
+    async def _report(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.broadcast.postEvent(AlconnaStatsReport(self.stats()))
+
+
+def _usage(*caches: Any) -> dict[str, int]:
+    data = [getattr(i, "data", i) for i in caches if i is not None]
+    return {
+        "entries": sum(len(i) for i in data),
+        "bytes": sum(retained(i, opaque=(Alconna, AlconnaDispatcher)) for i in data),
+    }
+
+
+def _with_rate(stats: dict[str, Any]) -> dict[str, Any]:
+    total = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": stats["hits"] / total if total else 0.0}
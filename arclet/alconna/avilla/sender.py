@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Hashable, Optional
+
+from avilla.core import Context
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from .model import SendConfig
+
+
+def merge_chains(*chains: MessageChain) -> MessageChain:
+    """以换行连接多条消息链"""
+    elements = []
+    for chain in chains:
+        if elements:
+            elements.append(Text("\n"))
+        elements.extend(chain.content)
+    return MessageChain(elements)
+
+
+class _Bucket:
+    """令牌桶"""
+
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def delay(self) -> float:
+        """取出一个令牌, 返回需要等待的时间"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class _Queue:
+    __slots__ = ("scene", "items", "bucket", "task")
+
+    def __init__(self, scene: Any, bucket: Optional[_Bucket]):
+        self.scene = scene
+        self.items: deque[MessageChain] = deque()
+        self.bucket = bucket
+        self.task: Optional[asyncio.Task] = None
+
+
+class OutputSender:
+    """
+    输出信息的发送队列
+
+    每个 (账号, 场景) 拥有一个有界队列, 由一个后台任务按顺序发送, 队列清空后任务即退出;
+    调度器只需入队, 不再等待消息发送完成. 可选地在合并窗口内将多条输出合并为一条消息,
+    并以令牌桶限制每个场景的发送速率; 队列已满时按 overflow 将新的输出合并到队尾 (默认) 或丢弃.
+    经由队列的输出不保证与其他途径发送的消息之间的顺序, 发送失败时异常交由事件循环的异常处理器
+    """
+
+    def __init__(self, config: Optional[SendConfig] = None):
+        self.stats = {"sent": 0, "merged": 0, "dropped": 0, "failed": 0}
+        self.queues: dict[Hashable, _Queue] = {}
+        self.configure(config or {})
+
+    def configure(self, config: SendConfig):
+        self.max_queue = config.get("max_queue", 32)
+        self.window = config.get("window", 0.0)
+        self.rate = config.get("rate")
+        self.burst = config.get("burst", 1)
+        self.overflow = config.get("overflow", "merge")
+        for queue in self.queues.values():
+            queue.bucket = self._bucket()
+
+    def _bucket(self) -> Optional[_Bucket]:
+        return _Bucket(self.rate, max(self.burst, 1)) if self.rate else None
+
+    def submit(self, ctx: Context, message: MessageChain) -> bool:
+        """将输出信息加入对应场景的队列, 返回是否被接收 (丢弃时为 False)"""
+        key = (ctx.account.route, ctx.scene)
+        if (queue := self.queues.get(key)) is None:
+            queue = self.queues[key] = _Queue(ctx.scene, self._bucket())
+        if len(queue.items) >= self.max_queue:
+            if self.overflow != "merge" or not queue.items:
+                self.stats["dropped"] += 1
+                return False
+            queue.items[-1] = merge_chains(queue.items[-1], message)
+            self.stats["merged"] += 1
+        else:
+            queue.items.append(message)
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._run(key, queue))
+        return True
+
+    async def _run(self, key: Hashable, queue: _Queue):
+        try:
+            while queue.items:
+                if self.window:
+                    await asyncio.sleep(self.window)
+                    chains = list(queue.items)
+                    queue.items.clear()
+                    message = merge_chains(*chains)
+                    self.stats["merged"] += len(chains) - 1
+                else:
+                    message = queue.items.popleft()
+                if queue.bucket and (delay := queue.bucket.delay()):
+                    await asyncio.sleep(delay)
+                try:
+                    await queue.scene.send_message(message)
+                    self.stats["sent"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    asyncio.get_running_loop().call_exception_handler(
+                        {"message": "failed to send alconna output", "exception": e, "task": queue.task}
+                    )
+        finally:
+            queue.task = None
+            if not queue.items and self.queues.get(key) is queue:
+                del self.queues[key]
+
+    async def flush(self):
+        """等待所有队列中的输出发送完毕"""
+        while tasks := [queue.task for queue in self.queues.values() if queue.task]:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def clear(self):
+        """丢弃所有尚未发送的输出"""
+        for queue in self.queues.values():
+            queue.items.clear()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Callable, Hashable, Optional
+
+from tarina.lang import lang
+from tarina.lang.model import LangItem
+
+from .i18n import Lang
+
+
+class LocaleTexts:
+    """
+    按当前语言缓存的文本
+
+    文本在首次使用时渲染, 由所有调度器共享; 切换语言 (lang.select) 后, 首次访问时整体失效并调用已注册的回调
+    (渲染缓存即由此清空). 通过 lang.set 修改文本内容后需手动调用 clear
+    """
+
+    def __init__(self):
+        self.locale: Optional[str] = None
+        self.data: dict[Hashable, str] = {}
+        self.hooks: list[Callable[[str], None]] = []
+
+    def sync(self) -> str:
+        """检查当前语言, 变化时清空缓存并调用回调"""
+        if (current := lang.current) != self.locale:
+            self.data.clear()
+            self.locale = current
+            for hook in self.hooks:
+                hook(current)
+        return current
+
+    def on_change(self, hook: Callable[[str], None]):
+        """注册语言变化时的回调"""
+        self.hooks.append(hook)
+        return hook
+
+    def get(self, key: Hashable, factory: Callable[[], str]) -> str:
+        self.sync()
+        if (text := self.data.get(key)) is None:
+            text = self.data[key] = factory()
+        return text
+
+    def item(self, item: LangItem, **kwargs: str) -> str:
+        """渲染 i18n 条目"""
+        return self.get((*item, *kwargs.items()), lambda: item(**kwargs))
+
+    def clear(self):
+        self.data.clear()
+
+
+texts = LocaleTexts()
+
+
+def completion_help(tab: str, enter: str, exit: str, hides: frozenset[str]) -> str:
+    """补全会话提示末尾的操作说明, hides 中的操作不予显示"""
+
+    def render():
+        if len(hides) >= 3:
+            return ""
+        return "\n\n{}{}{}{}\n".format(
+            (Lang.completion.avilla.tab(cmd=tab) + "\n") if "tab" not in hides else "",
+            (Lang.completion.avilla.enter(cmd=enter) + "\n") if "enter" not in hides else "",
+            (Lang.completion.avilla.exit(cmd=exit) + "\n") if "exit" not in hides else "",
+            Lang.completion.avilla.other(),
+        )
+
+    return texts.get(("completion_help", tab, enter, exit, hides), render)
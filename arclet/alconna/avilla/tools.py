@@ -1,8 +1,11 @@
 import inspect
 import re
-from functools import lru_cache
+import sys
+from concurrent.futures import Executor
+from functools import lru_cache, wraps
 from typing import Any, Callable, Hashable, Literal, Optional, Union
 
+from arclet.alconna.config import config
 from arclet.alconna.tools import AlconnaFormat
 from arclet.alconna.tools.construct import AlconnaString, FuncMounter, MountConfig
 from arclet.alconna.typing import CommandMeta, ShortcutArgs
@@ -18,11 +21,16 @@ from graia.saya.factory import BufferModifier, SchemaWrapper, buffer_modifier, e
 from nepattern import BasePattern, Empty, MatchMode, parser
 from tarina import gen_subclass, is_awaitable
 
-from arclet.alconna import Alconna, AllParam, Namespace
+from arclet.alconna import Alconna, AllParam, Arparma, Namespace
 
+from .affix import prefix_matcher, suffix_matcher
 from .dispatcher import AlconnaDispatcher, CommandResult
-from .model import CompConfig
+from .lazy import LazyCommand
+from .model import BudgetConfig, CompConfig
+from .router import _REGEX_SPECIAL
+from .routing import Route
 from .saya import AlconnaSchema
+from .view import ChainView
 
 
 def fetch_name(path: str = "name"):
@@ -53,17 +61,12 @@ def match_path(path: str):
     当 path 为 ‘$main’ 时表示认定当且仅当主命令匹配
     """
 
-    def __wrapper__(result: CommandResult):
+    def __wrapper__(result: Arparma):
         if path == "$main":
-            if not result.result.components:
-                return True
-            raise ExecutionStop
-        else:
-            if result.result.query(path, "\0") == "\0":
-                raise ExecutionStop
-            return True
+            return not result.components
+        return result.query(path, "\0") != "\0"
 
-    return Depend(__wrapper__)
+    return Route(("path", path), __wrapper__)
 
 
 def match_value(path: str, value: Any, or_not: bool = False):
@@ -73,14 +76,12 @@ def match_value(path: str, value: Any, or_not: bool = False):
     当 or_not 为真时允许查询 path 失败时继续执行事件处理
     """
 
-    def __wrapper__(result: CommandResult):
-        if result.result.query(path) == value:
-            return True
-        if or_not and result.result.query(path, Empty) == Empty:
+    def __wrapper__(result: Arparma):
+        if result.query(path) == value:
             return True
-        raise ExecutionStop
+        return or_not and result.query(path, Empty) == Empty
 
-    return Depend(__wrapper__)
+    return Route(("value", path, value, or_not), __wrapper__)
 
 
 def shortcuts(mapping: Optional[dict[str, ShortcutArgs]] = None, **kwargs: ShortcutArgs):
@@ -97,7 +98,7 @@ def shortcuts(mapping: Optional[dict[str, ShortcutArgs]] = None, **kwargs: Short
 
 @factory
 def alcommand(
-    alconna: Union[Alconna, str],
+    alconna: Union[Alconna, str, LazyCommand],
     send_error: bool = False,
     post: bool = False,
     patterns: Optional[list[str]] = None,
@@ -105,6 +106,10 @@ def alcommand(
     need_tome: bool = False,
     remove_tome: bool = True,
     merge_reply: Union[bool, Literal["left", "right"]] = False,
+    parse_executor: Optional[Executor] = None,
+    parse_budget: Optional[BudgetConfig] = None,
+    exclusive: Optional[str] = None,
+    lazy: bool = False,
 ) -> SchemaWrapper:
     """
     saya-util 形式的注册一个消息事件监听器并携带 AlconnaDispatcher
@@ -112,7 +117,7 @@ def alcommand(
     请将其放置在装饰器的顶层
 
     Args:
-        alconna (Alconna | str): 使用的 Alconna 命令
+        alconna (Alconna | str | LazyCommand): 使用的 Alconna 命令
         send_error (bool, optional): 是否发送错误信息
         post (bool, optional): 是否以事件发送输出信息
         patterns (list[str] | None, optional): 在可能的以 Avilla 为基础框架时使用的 selector 匹配模式
@@ -120,12 +125,20 @@ def alcommand(
         need_tome (bool, optional): 是否需要 @ 机器人
         remove_tome (bool, optional): 是否移除 @ 机器人
         merge_reply (bool | "left" | "right", optional): 是否将引用的原消息合并到指令内
+        parse_executor (Executor | None, optional): 用于解析的线程池或进程池
+        parse_budget (BudgetConfig | None, optional): 解析预算
+        exclusive (str | None, optional): 所属的互斥组名称
+        lazy (bool, optional): 是否延迟构建字符串形式的命令, 直到首次使用或预热时
     """
 
     def wrapper(func: Callable, buffer: dict[str, Any]) -> AlconnaSchema:
         if isinstance(alconna, str):
-            custom_args = {v.name: v.annotation for v in inspect.signature(func).parameters.values()}
-            cmd = AlconnaFormat(alconna, custom_args)
+
+            def build():
+                custom_args = {v.name: v.annotation for v in inspect.signature(func).parameters.values()}
+                return AlconnaFormat(alconna, custom_args)
+
+            cmd = LazyCommand(build, alconna) if lazy else build()
         else:
             cmd = alconna
         dispatcher = AlconnaDispatcher(
@@ -136,6 +149,9 @@ def alcommand(
             need_tome=need_tome,
             remove_tome=remove_tome,
             merge_reply=merge_reply,
+            parse_executor=parse_executor,
+            parse_budget=parse_budget,
+            exclusive=exclusive,
         )
         _filter = Filter().cx.client
         _dispatchers = buffer.setdefault("dispatchers", [])
@@ -143,7 +159,7 @@ def alcommand(
             _dispatchers.append(_filter.follows(*patterns))
         _dispatchers.append(dispatcher)
         listen(MessageReceived)(func)
-        return AlconnaSchema(dispatcher.command)
+        return AlconnaSchema(dispatcher.command if dispatcher.ready else dispatcher)
 
     return wrapper
 
@@ -175,12 +191,21 @@ def search_element(name: str):
             return i
 
 
-def _get_filter_out() -> list[type[Element]]:
+@lru_cache()
+def _get_filter_out() -> tuple[type[Element], ...]:
     res = []
     for i in ["Source", "Quote", "File"]:
         if t := search_element(i):
             res.append(t)
-    return res
+    return tuple(res)
+
+
+def _target_index(chain: MessageChain, filter_out: tuple[type[Element], ...], last: bool = False) -> Optional[int]:
+    """获取首个 (或最后一个) 不属于 filter_out 的元素的位置, 不复制消息链"""
+    indexes = range(len(chain.content) - 1, -1, -1) if last else range(len(chain.content))
+    for index in indexes:
+        if not isinstance(chain.content[index], filter_out):
+            return index
 
 
 def prefixed(pat: BasePattern):
@@ -215,31 +240,40 @@ class MatchPrefix(Decorator, Derive[MessageChain]):
             raise ValueError(prefix)
         self.pattern = prefixed(pattern)
         self.extract = extract
+        self._slot = prefix_matcher.bind(self, prefix) if isinstance(prefix, str) else None
 
     async def target(self, interface: DecoratorInterface):  # type: ignore
-        return await self(
-            await interface.dispatcher_interface.lookup_param("message_chain", MessageChain, None),
-            interface.dispatcher_interface,
-        )
-
-    async def __call__(self, chain: MessageChain, interface: DispatcherInterface) -> MessageChain:
-        header = chain.include(*_get_filter_out())
-        rest: MessageChain = chain.exclude(*_get_filter_out())
-        if not rest.content:
+        res = self.match(await interface.dispatcher_interface.lookup_param("message_chain", MessageChain, None))
+        if isinstance(res, ChainView) and interface.name != "_bcc_headless_decorators":
+            return res.chain
+        return res
+
+    def match(self, chain: MessageChain) -> Union[MessageChain, ChainView]:
+        """匹配前缀, 非提取模式下返回去除前缀后的消息链视图"""
+        header = _get_filter_out()
+        if (index := _target_index(chain, header)) is None:
             raise ExecutionStop
-        elem = rest.content[0]
+        elem = chain.content[index]
+        if self._slot is not None:
+            if not isinstance(elem, Text) or (value := prefix_matcher.match(self._slot, elem.text)) is None:
+                raise ExecutionStop
+            if self.extract:
+                return MessageChain([Text(value)])
+            return ChainView.trim_prefix(chain, index, len(value), header)
         if isinstance(elem, Text) and (res := self.pattern.validate(elem.text)).success:
             if self.extract:
                 return MessageChain([Text(str(res.value))])
-            elem.text = elem.text[len(str(res.value)) :].lstrip()
-            return header + rest
+            return ChainView.trim_prefix(chain, index, len(str(res.value)), header)
         elif self.pattern.validate(elem).success:
             if self.extract:
                 return MessageChain([elem])
-            rest.content.remove(elem)
-            return header + rest
+            return ChainView(chain, index, None, header)
         raise ExecutionStop
 
+    async def __call__(self, chain: MessageChain, interface: DispatcherInterface) -> MessageChain:
+        res = self.match(chain)
+        return res.chain if isinstance(res, ChainView) else res
+
 
 class MatchSuffix(Decorator, Derive[MessageChain]):
     pre = True
@@ -257,31 +291,40 @@ class MatchSuffix(Decorator, Derive[MessageChain]):
             raise ValueError(suffix)
         self.pattern = suffixed(pattern)
         self.extract = extract
+        self._slot = suffix_matcher.bind(self, suffix) if isinstance(suffix, str) else None
 
     async def target(self, interface: DecoratorInterface):  # type: ignore
-        return await self(
-            await interface.dispatcher_interface.lookup_param("message_chain", MessageChain, None),
-            interface.dispatcher_interface,
-        )
-
-    async def __call__(self, chain: MessageChain, interface: DispatcherInterface) -> MessageChain:
-        header = chain.include(*_get_filter_out())
-        rest: MessageChain = chain.exclude(*_get_filter_out())
-        if not rest.content:
+        res = self.match(await interface.dispatcher_interface.lookup_param("message_chain", MessageChain, None))
+        if isinstance(res, ChainView) and interface.name != "_bcc_headless_decorators":
+            return res.chain
+        return res
+
+    def match(self, chain: MessageChain) -> Union[MessageChain, ChainView]:
+        """匹配后缀, 非提取模式下返回去除后缀后的消息链视图"""
+        header = _get_filter_out()
+        if (index := _target_index(chain, header, last=True)) is None:
             raise ExecutionStop
-        elem = rest.content[-1]
+        elem = chain.content[index]
+        if self._slot is not None:
+            if not isinstance(elem, Text) or (value := suffix_matcher.match(self._slot, elem.text)) is None:
+                raise ExecutionStop
+            if self.extract:
+                return MessageChain([Text(value)])
+            return ChainView.trim_suffix(chain, index, len(elem.text) - len(value), header)
         if isinstance(elem, Text) and (res := self.pattern.validate(elem.text)).success:
             if self.extract:
                 return MessageChain([Text(str(res.value))])
-            elem.text = elem.text[: elem.text.rfind(str(res.value))].rstrip()
-            return header + rest
+            return ChainView.trim_suffix(chain, index, elem.text.rfind(str(res.value)), header)
         elif self.pattern.validate(elem).success:
             if self.extract:
                 return MessageChain([elem])
-            rest.content.remove(elem)
-            return header + rest
+            return ChainView(chain, index, None, header)
         raise ExecutionStop
 
+    async def __call__(self, chain: MessageChain, interface: DispatcherInterface) -> MessageChain:
+        res = self.match(chain)
+        return res.chain if isinstance(res, ChainView) else res
+
 
 @buffer_modifier
 def startswith(prefix: Any, include: bool = False, bind: Optional[str] = None) -> BufferModifier:
@@ -376,18 +419,111 @@ element_mapping = {
 }
 
 
+def _deferred(name: str):
+    method = getattr(AlconnaString, name)
+
+    @wraps(method)
+    def wrapper(self: "AvillaCommand", *args, **kwargs):
+        if self._pending is not None:
+            self._pending.append((name, args, kwargs))
+            return self
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class AvillaCommand(AlconnaString):
+    """
+    Avilla 形式的字符串命令构造器
+
+    lazy 为 True 时, 命令字符串的解析与各方法的调用均被记录, 直到 build 时才执行;
+    经由 __call__ 注册时, 命令在首次使用或预热时才构建
+    """
+
+    def __init__(
+        self,
+        command: str,
+        help_text: Optional[str] = None,
+        meta: Optional[CommandMeta] = None,
+        *,
+        lazy: bool = False,
+        types: Optional[dict[str, Any]] = None,
+    ):
+        self.lazy = lazy
+        self.types = sys._getframe(1).f_globals if types is None else types
+        """解析参数类型时使用的命名空间, 默认为调用者模块的全局变量"""
+        self.args_gen = self._scoped_args_gen
+        self.params: dict[str, Any] = {}
+        self._spec = (command, help_text, meta)
+        self._pending: Optional[list[tuple[str, tuple, dict]]] = None
+        if lazy:
+            self._pending = []
+        else:
+            super().__init__(command, help_text, meta)
+
     @staticmethod
     def args_gen(pattern: str, types: dict):
         return AlconnaString.args_gen(pattern, {**types, **element_mapping})
 
+    def _scoped_args_gen(self, pattern: str, types: dict):
+        """
+        以记录的命名空间解析参数类型
+
+        AlconnaString 以调用者所在模块查找参数类型, 而经由构造函数、Command 或延迟构建时调用者均为本模块
+        """
+        return type(self).args_gen(pattern, {**types, **self.types})
+
+    def header(self) -> Optional[tuple[list[str], list[type]]]:
+        """
+        构建前用于命令路由的命令头索引键
+
+        仅当命令关闭了模糊匹配, 且未调用 namespace、config 与 shortcut 时才能在构建前确定, 否则返回 None
+        """
+        command, _, meta = self._spec
+        ns = config.default_namespace
+        if meta is None or meta.fuzzy_match or ns.fuzzy_match or ns.prefixes or tuple(ns.separators) != (" ",):
+            return
+        if any(name in ("namespace", "config", "shortcut") for name, _, _ in self._pending or ()):
+            return
+        head = command.split(" ", 1)[0]
+        prefixes = [""]
+        if mat := re.match(r"^\[(.+?)]", head):
+            prefixes = mat[1].split("|")
+            head = head[mat.end() :]
+        if not head or head.startswith("re:") or any(char in _REGEX_SPECIAL for char in head):
+            return
+        return [f"{prefix}{head}" for prefix in prefixes], []
+
     def namespace(self, ns: Union[str, Namespace]):
+        if self._pending is not None:
+            self._pending.append(("namespace", (ns,), {}))
+            return self
         self.buffer["namespace"] = ns
         return self
 
+    alias = _deferred("alias")
+    config = _deferred("config")
+    option = _deferred("option")
+    subcommand = _deferred("subcommand")
+    usage = _deferred("usage")
+    example = _deferred("example")
+    shortcut = _deferred("shortcut")
+    action = _deferred("action")
+
+    def compile(self):
+        """执行被延迟的命令字符串解析与方法调用"""
+        if self._pending is None:
+            return self
+        pending, self._pending = self._pending, None
+        super().__init__(*self._spec)
+        for name, args, kwargs in pending:
+            getattr(self, name)(*args, **kwargs)
+        return self
+
     def build(
         self,
     ):
+        self.compile()
         ns = self.buffer.pop("namespace", None)
         alc = Alconna(*self.buffer.values(), *self.options, namespace=ns, meta=self.meta)
         for action in self.actions:
@@ -397,9 +533,12 @@ class AvillaCommand(AlconnaString):
         return alc
 
     def __call__(self, func=None):
-        params = self.buffer.pop("$params", {})
         if not func:
-            if self.actions:
+            if self._pending is not None:
+                has_actions = any(name == "action" for name, _, _ in self._pending)
+            else:
+                has_actions = bool(self.actions)
+            if has_actions:
 
                 async def _func(ctx: Context, cmd: Alconna):
                     for res in cmd.exec_result.values():
@@ -411,7 +550,9 @@ class AvillaCommand(AlconnaString):
                 func = _func
             else:
                 return
-        return alcommand(self.build(), **params)(func)
+        if self.lazy:
+            return alcommand(LazyCommand(self.build, self._spec[0], self.header()), **self.params)(func)
+        return alcommand(self.build(), **self.params)(func)
 
 
 def Command(
@@ -425,9 +566,13 @@ def Command(
     need_tome: bool = False,
     remove_tome: bool = True,
     merge_reply: Union[bool, Literal["left", "right"]] = False,
+    parse_executor: Optional[Executor] = None,
+    parse_budget: Optional[BudgetConfig] = None,
+    exclusive: Optional[str] = None,
+    lazy: bool = False,
 ):
-    cmd = AvillaCommand(command, help_text, meta)
-    cmd.buffer["$params"] = {
+    cmd = AvillaCommand(command, help_text, meta, lazy=lazy, types=sys._getframe(1).f_globals)
+    cmd.params = {
         "send_error": send_error,
         "post": post,
         "patterns": patterns,
@@ -435,6 +580,9 @@ def Command(
         "need_tome": need_tome,
         "remove_tome": remove_tome,
         "merge_reply": merge_reply,
+        "parse_executor": parse_executor,
+        "parse_budget": parse_budget,
+        "exclusive": exclusive,
     }
     return cmd
 
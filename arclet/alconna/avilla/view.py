@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from graia.amnesia.message import Element, MessageChain, Text
+
+
+class ChainView:
+    """
+    消息链的轻量视图
+
+    表示 "原消息链中第 index 个元素被截取为 text[start:stop] (span 为 None 时移除该元素)",
+    且 header 类型的元素 (如 Source、Quote) 被移至最前; 不复制也不修改原消息链的元素,
+    仅在访问 chain 时生成新的 MessageChain
+    """
+
+    __slots__ = ("origin", "index", "span", "header", "_chain")
+
+    def __init__(
+        self,
+        origin: MessageChain,
+        index: int,
+        span: Optional[tuple[int, int]] = None,
+        header: tuple[type[Element], ...] = (),
+    ):
+        self.origin = origin
+        self.index = index
+        self.span = span
+        self.header = header
+        self._chain: Optional[MessageChain] = None
+
+    @classmethod
+    def trim_prefix(cls, origin: MessageChain, index: int, length: int, header: tuple[type[Element], ...] = ()):
+        """去除第 index 个文本元素的前 length 个字符及其后的空白"""
+        text: str = origin.content[index].text  # type: ignore
+        return cls(origin, index, (len(text) - len(text[length:].lstrip()), len(text)), header)
+
+    @classmethod
+    def trim_suffix(cls, origin: MessageChain, index: int, stop: int, header: tuple[type[Element], ...] = ()):
+        """仅保留第 index 个文本元素 stop 之前的字符, 并去除尾随空白"""
+        text: str = origin.content[index].text  # type: ignore
+        return cls(origin, index, (0, len(text[:stop].rstrip())), header)
+
+    @property
+    def chain(self) -> MessageChain:
+        """按需生成的消息链"""
+        if self._chain is None:
+            elements = []
+            rest = []
+            for i, elem in enumerate(self.origin.content):
+                if isinstance(elem, self.header):
+                    elements.append(elem)
+                elif i != self.index:
+                    rest.append(elem)
+                elif self.span is not None:
+                    rest.append(Text(elem.text[self.span[0] : self.span[1]], elem.style))  # type: ignore
+            elements.extend(rest)
+            self._chain = MessageChain(elements)
+        return self._chain
+
+    def __repr__(self):
+        return f"ChainView(index={self.index}, span={self.span}, origin={self.origin!r})"
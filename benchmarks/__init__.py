@@ -0,0 +1,9 @@
+"""
+Alconna-Avilla 的性能基准
+
+各基准均可作为模块直接运行, 如 `python -m benchmarks.bench_token`
+
+- bench_token: 消息链 token 的生成
+- bench_pipeline: 基于本地协议 (protocol) 与合成命令 (commands) 的端到端事件处理
+- bench_startup: 命令注册 (冷启动) 的耗时, 比较立即构建与延迟构建
+"""
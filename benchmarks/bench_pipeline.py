@@ -0,0 +1,169 @@
+"""
+端到端地测量 MessageReceived 经过 AlconnaDispatcher 与监听器的耗时
+
+使用本地的 Broadcast、Saya 与 AlconnaBehaviour, 以及不进行网络通信的 BenchProtocol;
+每个场景报告吞吐量、p50/p99 延迟与内存占用
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from arclet.alconna.manager import command_manager
+from avilla.core import Avilla
+from creart import it
+from graia.amnesia.message import MessageChain, Text
+from graia.broadcast import Broadcast
+from graia.saya import Saya
+from loguru import logger
+
+from arclet.alconna.avilla import AlconnaBehaviour
+from arclet.alconna.avilla.create import AlconnaBehaviorCreator
+
+from .protocol import BenchProtocol
+
+MODULE = "benchmarks.commands"
+
+
+@dataclass
+class Scenario:
+    name: str
+    env: dict = field(default_factory=dict)
+    """传给 benchmarks.commands 的额外配置"""
+    description: str = ""
+
+
+SCENARIOS = {
+    "chatter": Scenario("chatter", description="不匹配任何命令的普通消息"),
+    "matching": Scenario("matching", description="依次匹配各个命令的消息"),
+    "need_tome": Scenario("need_tome", {"need_tome": True}, "需要 @ 机器人的命令, 一半消息未 @"),
+    "merge_reply": Scenario("merge_reply", {"merge_reply": True}, "合并引用消息的命令, 参数来自引用消息"),
+    "completion": Scenario("completion", {"completion": True}, "缺少参数触发补全会话, 再由同一用户补全"),
+}
+
+
+def percentile(data: list[float], q: float) -> float:
+    data = sorted(data)
+    return data[min(len(data) - 1, int(len(data) * q))]
+
+
+class Bench:
+    def __init__(self, count: int):
+        self.count = count
+        self.broadcast = it(Broadcast)
+        self.saya = it(Saya)
+        self.behaviour: AlconnaBehaviour = AlconnaBehaviorCreator.create(AlconnaBehaviour)
+        self.protocol = BenchProtocol(Avilla(broadcast=self.broadcast))
+        self.protocol.quote = MessageChain([Text("7")])
+        self.hits: list[int] = []
+
+    def load(self, scenario: Scenario):
+        self.hits.clear()
+        self.protocol.sent.clear()
+        with self.saya.module_context():
+            self.saya.require(MODULE, {"count": self.count, "hits": self.hits, **scenario.env})
+
+    def unload(self):
+        if channel := self.saya.channels.get(MODULE):
+            self.saya.uninstall_channel(channel)
+        for command in command_manager.get_commands():
+            command_manager.delete(command)
+
+    def round(self, scenario: Scenario, index: int) -> Callable[[], Awaitable[None]]:
+        """生成第 index 轮的执行函数"""
+        p = self.protocol
+        target = f"cmd{index % self.count}"
+        if scenario.name == "chatter":
+            event = p.event(f"今天天气不错 {index}")
+        elif scenario.name == "matching":
+            event = p.event(f"{target} {index}")
+        elif scenario.name == "need_tome":
+            event = p.event(f"{target} {index}", tome=index % 2 == 0)
+        elif scenario.name == "merge_reply":
+            event = p.event(target, reply=f"r{index}")
+        else:
+            return lambda: self.completion(index)
+
+        async def run():
+            await p.post(event)
+
+        return run
+
+    async def completion(self, index: int):
+        p = self.protocol
+        client = f"user{index}"
+        sent = len(p.sent)
+        first = p.post(p.event("cmd0", client=client))
+        while len(p.sent) == sent and not first.done():
+            await asyncio.sleep(0)
+        await p.post(p.event(str(index), client=client))
+        await first
+
+    async def measure(self, scenario: Scenario, events: int, warmup: int) -> dict:
+        self.load(scenario)
+        for index in range(warmup):
+            await self.round(scenario, index)()
+        self.hits.clear()
+        latencies = []
+        gc.collect()
+        start = time.perf_counter()
+        for index in range(warmup, warmup + events):
+            run = self.round(scenario, index)
+            t0 = time.perf_counter()
+            await run()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        hits = len(self.hits)
+        tracemalloc.start()
+        for index in range(warmup + events, warmup + events * 2):
+            await self.round(scenario, index)()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.unload()
+        return {
+            "scenario": scenario.name,
+            "events": events,
+            "hits": hits,
+            "throughput": events / elapsed,
+            "p50": statistics.median(latencies) * 1e3,
+            "p99": percentile(latencies, 0.99) * 1e3,
+            "mem_current": current / 1024,
+            "mem_peak": peak / 1024,
+        }
+
+
+async def run(args: argparse.Namespace):
+    bench = Bench(args.commands)
+    print(f"commands: {args.commands}, events: {args.events}")
+    print(
+        f"{'scenario':>12} {'hits':>6} {'events/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+        f"{'mem (KiB)':>10} {'peak (KiB)':>11}"
+    )
+    for name in args.scenarios:
+        res = await bench.measure(SCENARIOS[name], args.events, args.warmup)
+        print(
+            f"{res['scenario']:>12} {res['hits']:>6} {res['throughput']:>10.1f} {res['p50']:>9.3f} {res['p99']:>9.3f} "
+            f"{res['mem_current']:>10.1f} {res['mem_peak']:>11.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=60, help="合成命令的数量")
+    parser.add_argument("--events", type=int, default=500, help="每个场景测量的事件数")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
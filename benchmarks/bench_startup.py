@@ -0,0 +1,71 @@
+"""
+测量命令的注册 (冷启动) 耗时, 比较立即构建与延迟构建
+
+- eager: 导入模块时即构建所有命令
+- lazy: 延迟构建, 由第一条消息触发构建
+- warmup: 延迟构建, 加载后由 AlconnaBehaviour.warmup 在后台构建
+
+每种方式报告模块加载、预热与第一条消息的耗时 (多轮取中位数)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+
+from loguru import logger
+
+from .bench_pipeline import SCENARIOS, Bench, Scenario
+
+MODES = ("eager", "lazy", "warmup")
+
+
+async def measure(bench: Bench, mode: str) -> dict[str, float]:
+    gc.collect()
+    start = time.perf_counter()
+    bench.load(Scenario("startup", {"lazy": mode != "eager"}))
+    loaded = time.perf_counter()
+    if mode == "warmup":
+        await bench.behaviour.warmup()
+    warmed = time.perf_counter()
+    await bench.round(SCENARIOS["matching"], 1)()
+    first = time.perf_counter()
+    hits = len(bench.hits)
+    bench.unload()
+    return {
+        "load": (loaded - start) * 1e3,
+        "warmup": (warmed - loaded) * 1e3,
+        "first": (first - warmed) * 1e3,
+        "total": (first - start) * 1e3,
+        "hits": hits,
+    }
+
+
+async def run(args: argparse.Namespace):
+    bench = Bench(args.commands)
+    print(f"commands: {args.commands}, rounds: {args.rounds}")
+    print(f"{'mode':>8} {'hits':>5} {'load (ms)':>10} {'warmup (ms)':>12} {'first (ms)':>11} {'total (ms)':>11}")
+    for mode in args.modes:
+        results = [await measure(bench, mode) for _ in range(args.rounds)]
+        res = {key: statistics.median(i[key] for i in results) for key in results[0]}
+        print(
+            f"{mode:>8} {int(res['hits']):>5} {res['load']:>10.2f} {res['warmup']:>12.2f} "
+            f"{res['first']:>11.2f} {res['total']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=60, help="合成命令的数量")
+    parser.add_argument("--rounds", type=int, default=5, help="每种方式测量的轮数")
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""比较 BaseMessageChainArgv.generate_token 的新旧实现在纯文本 (pictures 为 -1) 与图片密集消息上的耗时"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from avilla.core import Selector
+from avilla.core.elements import Notice, Picture
+from avilla.core.resource import UrlResource
+from graia.amnesia.message import MessageChain, Text
+
+from arclet.alconna.avilla.argv import BaseMessageChainArgv
+
+
+def repr_token(data: list) -> int:
+    return hash("".join(i.__repr__() for i in data))
+
+
+def build_data(pictures: int) -> list:
+    if pictures < 0:
+        return ["setu", "--tag", "landscape", "-n", "3"]
+    chain: list = [Text("setu"), Notice(Selector().land("qq").group("123456").member("654321"))]
+    for index in range(pictures):
+        url = f"https://multimedia.nt.qq.com.cn/download?appid=1407&fileid={'x' * 160}{index}&spec=0&rkey={'y' * 96}"
+        chain.append(Picture(UrlResource(url)))
+        chain.append(Text(f"caption {index}"))
+    return [i.text if isinstance(i, Text) else i for i in MessageChain(chain).content]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--pictures", type=int, nargs="*", default=[-1, 0, 1, 4, 16])
+    args = parser.parse_args()
+    print(f"{'pictures':>8} {'repr (us)':>10} {'struct (us)':>12} {'memo (us)':>10} {'speedup':>8}")
+    for pictures in args.pictures:
+        data = build_data(pictures)
+        old = timeit.timeit(lambda: repr_token(data), number=args.number) / args.number * 1e6
+        BaseMessageChainArgv.disable_token_memo()
+        new = timeit.timeit(lambda: BaseMessageChainArgv.generate_token(data), number=args.number) / args.number * 1e6
+        BaseMessageChainArgv.enable_token_memo()
+        memo = timeit.timeit(lambda: BaseMessageChainArgv.generate_token(data), number=args.number) / args.number * 1e6
+        BaseMessageChainArgv.disable_token_memo()
+        print(f"{pictures:>8} {old:>10.2f} {new:>12.2f} {memo:>10.2f} {old / min(new, memo):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
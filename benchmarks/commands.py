@@ -0,0 +1,45 @@
+"""
+由 bench_pipeline 加载的 Saya 模块
+
+依据 `Saya.require` 时传入的环境生成一组合成命令 `cmd0` ~ `cmd{count - 1}`,
+依次使用 alcommand、Command 与 funcommand 注册; 环境中 lazy 为真时, alcommand 与 Command 注册的命令延迟构建
+"""
+
+from __future__ import annotations
+
+from graia.saya import Saya
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import Command, LazyCommand, alcommand, funcommand
+
+env: dict = Saya.current_env()
+hits: list[int] = env["hits"]
+options = {"need_tome": env.get("need_tome", False), "merge_reply": env.get("merge_reply", False)}
+lazy: bool = env.get("lazy", False)
+kinds = ("alcommand", "Command", "funcommand") if not any(options.values()) else ("alcommand", "Command")
+
+
+def register(index: int):
+    async def listener():
+        hits.append(index)
+
+    listener.__name__ = f"cmd{index}"
+    if index == 0 and env.get("completion"):
+        return alcommand(Alconna("cmd0", Args["x", int]), comp_session={"lite": True}, **options)(listener)
+    kind = kinds[index % len(kinds)]
+    if kind == "alcommand":
+        if lazy:
+            return alcommand(LazyCommand(lambda: Alconna(f"cmd{index}", Args["x", int])), **options)(listener)
+        return alcommand(Alconna(f"cmd{index}", Args["x", int]), **options)(listener)
+    if kind == "Command":
+        return Command(f"cmd{index} <x:int>", lazy=lazy, **options)(listener)
+
+    async def mounted(x: int):
+        hits.append(index)
+
+    mounted.__name__ = f"cmd{index}"
+    return funcommand(f"cmd{index}")(mounted)
+
+
+for i in range(env["count"]):
+    globals()[f"cmd{i}"] = register(i)
@@ -0,0 +1,80 @@
+"""用于基准测试的本地 Avilla 协议: 不进行任何网络通信, 发送的消息被记录在协议实例上"""
+
+from __future__ import annotations
+
+import itertools
+from datetime import datetime
+from typing import Any, Optional
+
+from avilla.core import Avilla, BaseAccount, Context, Message, Selector
+from avilla.core.account import AccountInfo
+from avilla.core.elements import Notice
+from avilla.core.platform import Abstract, Land, Platform
+from avilla.core.protocol import BaseProtocol
+from avilla.core.ryanvk.collector.account import AccountCollector
+from avilla.standard.core.message import MessageReceived, MessageSend
+from graia.amnesia.message import MessageChain, Text
+
+
+class BenchProtocol(BaseProtocol):
+    artifacts = {}
+
+    def __init__(self, avilla: Avilla):
+        self.avilla = avilla
+        self.sent: list[MessageChain] = []
+        self.pulled = 0
+        self.quote = MessageChain([Text("quoted")])
+        """被引用消息的内容"""
+        self.ids = itertools.count()
+        self.route = Selector().land("bench").account("bot")
+        self.account = BaseAccount(self.route, avilla)
+        avilla.accounts[self.route] = AccountInfo(
+            self.route, self.account, self, Platform(Land("bench"), Abstract("bench"))
+        )
+
+    def scene(self, group: str = "1") -> Selector:
+        return Selector().land("bench").group(group)
+
+    def event(
+        self,
+        content: str | MessageChain,
+        *,
+        client: str = "user",
+        group: str = "1",
+        tome: bool = False,
+        reply: Optional[str] = None,
+    ) -> MessageReceived:
+        """构造一条消息事件"""
+        scene = self.scene(group)
+        chain = MessageChain([Text(content)]) if isinstance(content, str) else content
+        if tome:
+            chain = MessageChain([Notice(scene.member("bot")), Text(" "), *chain.content])
+        context = Context(self.account, scene.member(client), scene, scene, scene.member("bot"))
+        message = Message(
+            str(next(self.ids)),
+            scene,
+            scene.member(client),
+            chain,
+            datetime.now(),
+            scene.message(reply) if reply else None,
+        )
+        return MessageReceived(context, message)
+
+    def post(self, event: MessageReceived) -> Any:
+        return self.post_event(event, event.context)
+
+
+class BenchPerform((m := AccountCollector["BenchProtocol", "BaseAccount"]())._):
+    @MessageSend.send.collect(m, target="land.group")
+    async def send(self, target: Selector, message: MessageChain, *, reply: Optional[Selector] = None) -> Selector:
+        self.protocol.sent.append(message)
+        return target.message(str(len(self.protocol.sent)))
+
+    @m.pull("land.group.message", Message)
+    async def get_message(self, target: Selector, route: type[Message]) -> Message:
+        self.protocol.pulled += 1
+        scene = target.into("::land.group")
+        return Message(target["message"], scene, scene.member("user"), self.protocol.quote, datetime.now())
+
+
+BenchPerform.apply_to(BenchProtocol.artifacts)
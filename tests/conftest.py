@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import AsyncExitStack
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from avilla.core import Message, Selector
+from avilla.standard.core.message import MessageReceived
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+
+def _make_event(chain, mid="1", client="u1", scene="g1", reply=None, sent=None, pulled=None):
+    """构造一条消息事件; 发送的消息记录于 sent, 拉取的引用消息记录于 pulled"""
+    sent = sent if sent is not None else []
+    scene_sel = Selector().land("test").group(scene)
+    client_sel = scene_sel.member(client)
+
+    class Scene:
+        def __init__(self):
+            self.data = scene_sel.pattern
+
+        async def send_message(self, msg):
+            sent.append(msg)
+
+        def __hash__(self):
+            return hash(scene_sel)
+
+        def __eq__(self, other):
+            return getattr(other, "data", None) == self.data
+
+        def __getattr__(self, item):
+            return getattr(scene_sel, item)
+
+    async def pull(_, target):
+        if pulled is not None:
+            pulled.append(target)
+        await asyncio.sleep(0)
+        return Message("r", scene_sel, client_sel, MessageChain([Text("quoted")]), datetime.now())
+
+    ctx = SimpleNamespace(
+        account=SimpleNamespace(route=Selector().land("test").account("bot")),
+        self=scene_sel.member("bot"),
+        client=client_sel,
+        scene=Scene(),
+        endpoint=scene_sel,
+        staff=SimpleNamespace(exit_stack=AsyncExitStack()),
+        pull=pull,
+    )
+    return MessageReceived(ctx, Message(mid, scene_sel, client_sel, chain, datetime.now(), reply=reply))
+
+
+@pytest.fixture
+def make_event():
+    return _make_event
@@ -0,0 +1,30 @@
+from arclet.alconna.avilla.affix import AffixMatcher
+
+
+def test_suffix_earlier_slot_matching_further_right():
+    matcher = AffixMatcher(suffix=True)
+    first = matcher.register(r"c\d")
+    second = matcher.register(r"\w+")
+    assert matcher.match(first, "xxc1") == "c1"
+    assert matcher.match(second, "xxc1") == "xxc1"
+
+    alone = AffixMatcher(suffix=True)
+    assert alone.match(alone.register(r"c\d"), "xxc1") == "c1"
+
+
+def test_prefix_backreference_after_other_slot():
+    matcher = AffixMatcher()
+    matcher.register("x+")
+    slot = matcher.register(r"(a)\1")
+    assert matcher.match(slot, "aab") == "aa"
+    assert matcher.match(slot, "abb") is None
+
+
+def test_prefix_combined_order():
+    matcher = AffixMatcher()
+    first = matcher.register(r"\d+")
+    second = matcher.register(r"\w+")
+    assert matcher.match(first, "12ab") == "12"
+    assert matcher.match(second, "12ab") == "12ab"
+    assert matcher.match(first, "ab") is None
+    assert matcher.match(second, "ab") == "ab"
@@ -0,0 +1,30 @@
+from arclet.alconna._internal._argv import Argv
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla.argv import BaseMessageChainArgv
+
+
+def test_shared_message_is_split_once(monkeypatch):
+    calls = []
+    build = Argv.build
+
+    def counted(self, data):
+        calls.append(data)
+        return build(self, data)
+
+    monkeypatch.setattr(Argv, "build", counted)
+    first = Alconna("argv_share", Args["x", int])
+    second = Alconna("argv_share", Args["y", str])
+    message = MessageChain([Text("argv_share 1")])
+    BaseMessageChainArgv.share(message)
+    assert first.parse(message).x == 1
+    assert second.parse(message).y == "1"
+    assert first.parse(message).matched
+    assert calls == [message]
+    assert len(BaseMessageChainArgv.shared[id(message)][1]) == 1
+
+    other = MessageChain([Text("argv_share 2")])
+    assert first.parse(other).x == 2 and first.parse(other).x == 2
+    assert calls == [message, other, other]
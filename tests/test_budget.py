@@ -0,0 +1,55 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+from nepattern import BasePattern, MatchMode
+
+from arclet.alconna import Alconna, Args, CommandMeta
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.budget import offender_key
+
+
+def test_overload_reply_without_router_index():
+    dispatcher = AlconnaDispatcher(
+        Alconna("budget_fuzzy", Args["x", str], meta=CommandMeta(fuzzy_match=True)),
+        parse_budget={"max_length": 10},
+    )
+    assert dispatcher.router is None
+    res, output = dispatcher.overload(None, MessageChain([Text("budget_fuzzy " + "a" * 20)]))
+    assert res.head_matched and output
+    res, output = dispatcher.overload(None, MessageChain([Text("budget_fuzz " + "a" * 20)]))
+    assert not res.head_matched and output is None
+    res, output = dispatcher.overload(None, MessageChain([Text("other " + "a" * 20)]))
+    assert not res.head_matched and output is None
+
+
+def test_time_budget_counts_only_own_parse(make_event):
+    def convert(_, value):
+        if value == "slow":
+            time.sleep(0.6)
+        return value
+
+    pattern = BasePattern(mode=MatchMode.VALUE_OPERATE, origin=str, converter=convert)
+    executor = ThreadPoolExecutor(4)
+    dispatcher = AlconnaDispatcher(
+        Alconna("budget_time", Args["x", pattern]), parse_executor=executor, parse_budget={"max_time": 0.3}
+    )
+    slow_msg, fast_msg = MessageChain([Text("budget_time slow")]), MessageChain([Text("budget_time fast")])
+    slow_event, fast_event = make_event(slow_msg, client="slow"), make_event(fast_msg, client="fast")
+
+    async def main():
+        slow = asyncio.create_task(dispatcher.parse(slow_event, slow_msg, None))  # type: ignore
+        await asyncio.sleep(0.05)
+        fast = await dispatcher.parse(fast_event, fast_msg, None)  # type: ignore
+        return await slow, fast
+
+    try:
+        (slow_res, slow_output), (fast_res, _) = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert str(slow_res.error_info) == "overload" and slow_output
+    assert fast_res.matched and fast_res.x == "fast"
+    assert offender_key(slow_event) in dispatcher.budget.strikes  # type: ignore
+    assert offender_key(fast_event) not in dispatcher.budget.strikes  # type: ignore
@@ -0,0 +1,136 @@
+import asyncio
+import gc
+import time
+from types import SimpleNamespace
+
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.cache import OutputStore, RenderCache, ReplyCache, ResultStore
+
+
+def test_render_cache_counts_only_rendered_outputs():
+    cache = RenderCache()
+    stamp = lambda: ()  # noqa: E731
+    assert cache.get(1, "zh-CN", ("help",), "cmd 1", stamp) is None
+    assert cache.stats() == {"size": 0, "hits": 0, "misses": 0}
+    assert cache.get(1, "zh-CN", ("help",), "cmd --help", stamp) is None
+    cache.set(1, "zh-CN", "help", "cmd --help", "usage", None, ())
+    assert cache.get(1, "zh-CN", ("help",), "cmd --help", stamp).text == "usage"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_render_cache_cleared_on_locale_change():
+    from tarina.lang import lang
+
+    from arclet.alconna.avilla.dispatcher import render_cache
+    from arclet.alconna.avilla.texts import texts
+
+    origin = texts.sync()
+    render_cache.set(1, origin, "help", "cmd --help", "usage", None, ())
+    lang.select("en-US" if origin != "en-US" else "zh-CN")
+    try:
+        texts.sync()
+        assert not render_cache.data
+    finally:
+        lang.select(origin)
+        texts.sync()
+
+
+def test_result_store_keeps_pending_futures():
+    async def main():
+        store = ResultStore(capacity=1, ttl=0.01)
+        pending = store.set("a")
+        time.sleep(0.02)
+        store.set("b").set_result(1)
+        assert store.get("a") is pending
+        assert store.stats()["pinned"] == 1
+        pending.set_result(None)
+        time.sleep(0.02)
+        assert store.get("a") is None and store.get("b") is None
+        assert store.stats()["evictions"] == 2
+
+    asyncio.run(main())
+
+
+def test_result_store_capacity_and_release():
+    from arclet.alconna.avilla.dispatcher import get_result_store, release_partition, result_cache
+
+    async def main():
+        store = ResultStore(capacity=2)
+        for key in "abc":
+            store.set(key).set_result(key)
+        assert list(store.data) == ["b", "c"]
+        store.get("b")
+        store.set("d").set_result("d")
+        assert list(store.data) == ["b", "d"]
+
+        alc = Alconna("cache_release")
+        get_result_store(alc).set("1@bot").set_result(None)
+        assert alc._hash in result_cache
+        release_partition(alc._hash)
+        assert alc._hash not in result_cache
+
+    asyncio.run(main())
+
+
+def test_event_cache_shared_and_released(make_event):
+    from arclet.alconna.avilla.dispatcher import get_source_id, source_cache
+
+    event = make_event(MessageChain([Text("cache_event 1")]), mid="cache-event")
+    source_id = get_source_id(event)
+    first = AlconnaDispatcher(Alconna("cache_event", Args["x", int]))
+    second = AlconnaDispatcher(Alconna("cache_event2", Args["x", int]))
+    states = [asyncio.run(i.prepare(SimpleNamespace(event=event))) for i in (first, second)]  # type: ignore
+    assert states[0].message is states[1].message
+    assert list(source_cache.partition(event, source_id)) == [("tome", False)]
+
+    del event, states
+    gc.collect()
+    assert source_id not in source_cache.data
+
+
+def test_reply_cache_coalesces_and_caches_failures():
+    cache = ReplyCache(negative_ttl=0.01)
+    calls = []
+
+    async def pull():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "quoted"
+
+    async def fail():
+        calls.append(0)
+        raise LookupError
+
+    async def main():
+        assert await asyncio.gather(*(cache.fetch("bot", "1", pull) for _ in range(3))) == ["quoted"] * 3
+        assert await cache.fetch("bot", "1", pull) == "quoted"
+        assert await cache.fetch("other", "1", pull) == "quoted"
+        assert await cache.fetch("bot", "2", fail, (LookupError,)) is None
+        assert await cache.fetch("bot", "2", fail, (LookupError,)) is None
+        await asyncio.sleep(0.02)
+        assert await cache.fetch("bot", "2", pull) == "quoted"
+
+    asyncio.run(main())
+    assert calls == [1, 1, 0, 1]
+    assert cache.stats()["coalesced"] == 2 and cache.stats()["failures"] == 1
+
+
+def test_output_store_queries_and_eviction():
+    store = OutputStore(capacity=2, ttl=0.05)
+    store.add("cmd_a", "help", "usage a", "m1", "u1")
+    store.add("cmd_b", "error", "bad b", "m1", "u2")
+    store.add("cmd_a", "help", "usage a", "m2", "u1")
+    assert store.get("m1", "cmd_a").text == "usage a"
+    assert store.get("m1").command == "cmd_b"
+    assert store.last("u1").source_id == "m2"
+
+    store.add("cmd_b", "help", "usage b", "m3", "u3")
+    assert store.get("m1") is None and store.last("u2") is None
+    store.forget("cmd_a")
+    assert store.last("u1") is None and "m2" not in store.messages
+    time.sleep(0.06)
+    assert store.get("m3") is None and store.last("u3") is None
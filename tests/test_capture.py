@@ -0,0 +1,31 @@
+import asyncio
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla.capture import capture
+
+alc = Alconna("capture_cmd", Args["x", int])
+
+
+def test_capture_is_context_local():
+    async def parse(text: str, delay: float):
+        with capture(alc) as cap:
+            await asyncio.sleep(delay)
+            alc.parse(text)
+            await asyncio.sleep(0.01)
+            return cap.get("output")
+
+    async def main():
+        return await asyncio.gather(parse("capture_cmd --help", 0.01), parse("capture_cmd 1", 0))
+
+    help_output, plain_output = asyncio.run(main())
+    assert help_output and "capture_cmd" in help_output
+    assert plain_output is None
+
+
+def test_nested_capture_restores_outer():
+    with capture(alc) as outer:
+        with capture(alc) as inner:
+            alc.parse("capture_cmd --help")
+        assert inner.get("output") and "output" not in outer
+        alc.parse("capture_cmd --help")
+    assert outer.get("output")
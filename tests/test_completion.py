@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+
+import pytest
+from arclet.alconna.completion import comp_ctx
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla.completion import CompletionPool, activate
+
+
+def test_release_session_from_foreign_context():
+    alc = Alconna("comp_pool", Args["a", int]["b", int])
+    pool = CompletionPool(alc)
+
+    async def owner():
+        session = pool.acquire("u1")
+        with activate(session):
+            alc.parse("comp_pool")
+        assert session.available
+        assert comp_ctx.get(None) is None
+
+    asyncio.run(owner())
+    contextvars.copy_context().run(pool.clear)
+    assert not pool.sessions
+
+
+def test_cancel_waiters_of_owner():
+    from graia.broadcast import Broadcast
+    from graia.broadcast.exceptions import ExecutionStop
+
+    from arclet.alconna.avilla.completion import CompletionInterrupt
+
+    async def main():
+        inc = CompletionInterrupt.of(Broadcast())
+        owner, other = object(), object()
+        mine = asyncio.create_task(inc.wait("u1", lambda _: None, owner=owner))
+        theirs = asyncio.create_task(inc.wait("u2", lambda _: None, owner=other))
+        await asyncio.sleep(0)
+        assert CompletionInterrupt.cancel_all(owner) == 1
+        with pytest.raises(ExecutionStop):
+            await mine
+        assert not theirs.done()
+        theirs.cancel()
+
+    asyncio.run(main())
+
+
+def test_completion_waiter_does_not_occupy_pool(make_event):
+    from arclet.alconna.avilla import AlconnaDispatcher
+
+    dispatcher = AlconnaDispatcher(Alconna("comp_waiter", Args["a", int]), comp_session={})
+    event = make_event(MessageChain([Text("comp_waiter")]))
+    for _ in range(3):
+        dispatcher.completion_waiter(event)
+    assert len(dispatcher._sessions) == 0
+
+
+def test_interrupt_routes_by_session_key(make_event):
+    from graia.broadcast import Broadcast
+
+    from arclet.alconna.avilla.completion import CompletionInterrupt, session_key
+
+    first, second, stranger = (make_event(MessageChain([Text(i)]), client=i) for i in ("u1", "u2", "u3"))
+    handled = []
+
+    def handler(tag):
+        async def _(event):
+            handled.append((tag, str(event.message.content)))
+            return tag
+
+        return _
+
+    async def main():
+        bcc = Broadcast()
+        inc = CompletionInterrupt.of(bcc)
+        older = asyncio.create_task(inc.wait(session_key(first), handler("older")))
+        newer = asyncio.create_task(inc.wait(session_key(first), handler("newer")))
+        other = asyncio.create_task(inc.wait(session_key(second), handler("other")))
+        await asyncio.sleep(0)
+        assert len(bcc.listeners) == 1
+        await bcc.postEvent(stranger)
+        await bcc.postEvent(first)
+        assert await newer == "newer"
+        assert not older.done() and not other.done()
+        await bcc.postEvent(second)
+        assert await other == "other"
+        older.cancel()
+
+    asyncio.run(main())
+    assert handled == [("newer", "u1"), ("other", "u2")]
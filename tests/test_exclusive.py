@@ -0,0 +1,43 @@
+import asyncio
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.exclusive import ExclusiveGroup
+from arclet.alconna.avilla.lazy import LazyCommand
+
+
+def test_members_decide_in_order():
+    later = AlconnaDispatcher(Alconna("ex_later", Args["x", int]), exclusive="ex_order", exclusive_order=1)
+    first = AlconnaDispatcher(Alconna("ex_first", Args["x", int]), exclusive="ex_order")
+    group = ExclusiveGroup.of("ex_order")
+    order = []
+
+    async def member(dispatcher, claimed):
+        turn = group.enter(dispatcher, "ex_order:1")
+        allowed = await group.wait(dispatcher, turn)
+        order.append((dispatcher.command.name, allowed))
+        group.done(dispatcher, turn, claimed and allowed)
+
+    async def main():
+        await asyncio.gather(member(later, True), member(first, False))
+
+    asyncio.run(main())
+    assert order == [("ex_first", True), ("ex_later", True)]
+
+
+def test_losers_are_skipped_without_building():
+    winner = AlconnaDispatcher(Alconna("ex_win", Args["x", int]), exclusive="ex_skip")
+    shared = AlconnaDispatcher(winner.command, exclusive="ex_skip", exclusive_order=1)
+    lazy = LazyCommand(lambda: Alconna("ex_lazy", Args["x", int]), "ex_lazy")
+    loser = AlconnaDispatcher(lazy, exclusive="ex_skip", exclusive_order=2)
+    group = ExclusiveGroup.of("ex_skip")
+
+    async def main():
+        turns = [group.enter(dispatcher, "ex_skip:1") for dispatcher in (loser, shared, winner)]
+        waits = [asyncio.create_task(group.wait(dispatcher, turns[0])) for dispatcher in (loser, shared)]
+        assert await group.wait(winner, turns[0])
+        group.done(winner, turns[0], True)
+        return await asyncio.gather(*waits)
+
+    assert asyncio.run(main()) == [False, True]
+    assert not loser.ready and not lazy.built
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import pytest
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+from nepattern import BasePattern, MatchMode
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.executor import parse_in_executor
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, /, *args, **kwargs):
+        raise RuntimeError("broken")
+
+
+def test_parse_in_thread_pool():
+    alc = Alconna("exec_thread", Args["x", int])
+    with ThreadPoolExecutor(1) as executor:
+        res, output = asyncio.run(parse_in_executor(executor, alc, MessageChain([Text("exec_thread 1")])))
+    assert res.matched and res.x == 1
+    assert output is None
+
+
+def test_executor_error_becomes_failed_parse():
+    alc = Alconna("exec_broken", Args["x", int])
+    res, output = asyncio.run(parse_in_executor(BrokenExecutor(), alc, MessageChain([Text("exec_broken 1")])))
+    assert not res.matched
+    assert isinstance(res.error_info, RuntimeError)
+    assert output is None
+
+
+def test_loop_parse_does_not_block_on_executor_parse():
+    def convert(_, value):
+        if value == "slow":
+            time.sleep(0.4)
+        return value
+
+    alc = Alconna("exec_mixed", Args["x", BasePattern(mode=MatchMode.VALUE_OPERATE, origin=str, converter=convert)])
+    executor = ThreadPoolExecutor(2)
+    offloaded = AlconnaDispatcher(alc, parse_executor=executor)
+    inline = AlconnaDispatcher(alc)
+
+    async def main():
+        slow = asyncio.create_task(offloaded.parse(None, MessageChain([Text("exec_mixed slow")]), None))  # type: ignore
+        await asyncio.sleep(0.1)
+        fast = asyncio.create_task(inline.parse(None, MessageChain([Text("exec_mixed fast")]), None))  # type: ignore
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        ticked = time.perf_counter() - started
+        return ticked, (await slow)[0], (await fast)[0]
+
+    try:
+        ticked, slow, fast = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert ticked < 0.2
+    assert slow.matched and slow.x == "slow"
+    assert fast.matched and fast.x == "fast"
+
+
+def test_abandoned_job_keeps_other_commands_running():
+    def convert(_, value):
+        if value == "slow":
+            time.sleep(0.4)
+        return value
+
+    pattern = BasePattern(mode=MatchMode.VALUE_OPERATE, origin=str, converter=convert)
+    first = Alconna("exec_abandon", Args["x", pattern])
+    other = Alconna("exec_other", Args["x", str])
+    executor = ThreadPoolExecutor(2)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(parse_in_executor(executor, first, MessageChain([Text("exec_abandon slow")])), 0.05)
+        queued = asyncio.create_task(parse_in_executor(executor, first, MessageChain([Text("exec_abandon fast")])))
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        res, _ = await parse_in_executor(executor, other, MessageChain([Text("exec_other 1")]))
+        elapsed = time.perf_counter() - started
+        return elapsed, res, (await queued)[0]
+
+    try:
+        elapsed, res, queued = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert elapsed < 0.2 and res.matched
+    assert queued.matched and queued.x == "fast"
@@ -0,0 +1,36 @@
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+from arclet.alconna import Alconna, Args, Arparma
+from arclet.alconna.avilla import AlconnaDispatcher, CommandResult, Match
+
+alc = Alconna("inject_cmd", Args["x", int]["y", str, "a"])
+dispatcher = AlconnaDispatcher(alc)
+
+
+def catch(result: CommandResult, name: str, annotation, default=inspect.Parameter.empty):
+    interface = SimpleNamespace(
+        local_storage={"alconna_result": result}, name=name, annotation=annotation, default=default
+    )
+    return asyncio.run(dispatcher.catch(interface))  # type: ignore
+
+
+def test_injection_plan_compiled_once():
+    first = CommandResult(alc.parse("inject_cmd 1 b"), "match")
+    second = CommandResult(alc.parse("inject_cmd 2"), "match", "out")
+    dispatcher._injections.clear()
+    assert catch(first, "x", int) == 1
+    assert catch(second, "x", int) == 2
+    assert catch(first, "y", Match[str]) == Match("b", True)
+    assert catch(second, "x", Match[str]) == Match(2, False)
+    assert catch(second, "output", str) == "out"
+    assert catch(first, "res", Arparma) is first.result
+    assert len(dispatcher._injections) == 5
+
+
+def test_unhashable_default_is_not_cached():
+    dispatcher._injections.clear()
+    result = CommandResult(alc.parse("inject_cmd 3"), "match")
+    assert catch(result, "x", int, []) == 3
+    assert not dispatcher._injections
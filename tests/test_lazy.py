@@ -0,0 +1,38 @@
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna import CommandMeta
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.lazy import LazyCommand
+from arclet.alconna.avilla.router import CommandRouter
+from arclet.alconna.avilla.tools import AvillaCommand
+
+
+class Point:
+    pass
+
+
+def test_args_gen_is_static():
+    args = AvillaCommand.args_gen("<x:int>", {})
+    assert args.argument[0].name == "x"
+
+
+def test_lazy_command_uses_caller_types():
+    cmd = AvillaCommand("lazy_types <p:Point>", lazy=True)
+    assert cmd.build().args.argument[0].value.origin is Point
+
+
+def test_lazy_header_prefilters_before_build():
+    cmd = AvillaCommand("[!|.]lazy_head <x:int>", meta=CommandMeta(fuzzy_match=False), lazy=True)
+    assert cmd.header() == (["!lazy_head", ".lazy_head"], [])
+    assert AvillaCommand("lazy_fuzzy <x:int>", lazy=True).header() is None
+
+    dispatcher = AlconnaDispatcher(LazyCommand(cmd.build, "lazy_head", cmd.header()))
+    router = CommandRouter()
+    router.add(dispatcher)
+    assert not router.accept(dispatcher, MessageChain([Text("other 1")]))
+    assert not dispatcher.ready
+    assert router.accept(dispatcher, MessageChain([Text(".lazy_head 1")]))
+    assert dispatcher.command.parse(MessageChain([Text(".lazy_head 1")])).matched
+    router.refresh(dispatcher)
+    assert router.accept(dispatcher, MessageChain([Text("!lazy_head 2")]))
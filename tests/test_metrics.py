@@ -0,0 +1,28 @@
+from arclet.alconna import Alconna
+from arclet.alconna.avilla.metrics import CommandMetrics, MetricsRegistry
+
+
+def test_registry_disabled_by_default():
+    registry = MetricsRegistry()
+    alc = Alconna("metrics_off")
+    assert registry.get(alc) is None and not registry.commands
+    registry.enabled = True
+    assert registry.get(alc) is registry.get(alc)
+    registry.reset()
+    assert not registry.commands
+
+
+def test_record_and_snapshot():
+    rec = CommandMetrics()
+    rec.record("match", 0.0002)
+    rec.record("match", 0.003)
+    rec.record("help", 2.0)
+    rec.lookup_time.observe(0.00001)
+    snapshot = rec.snapshot()
+    assert snapshot["parses"] == 3
+    assert snapshot["outcomes"] == {"match": 2, "help": 1}
+    buckets = snapshot["parse_time"]["buckets"]
+    assert buckets["0.0005"] == 1 and buckets["0.005"] == 1 and buckets["+Inf"] == 1
+    assert sum(buckets.values()) == snapshot["parse_time"]["count"] == 3
+    assert snapshot["lookup_time"]["buckets"]["0.0001"] == 1
+    assert snapshot["output_time"]["count"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+from graia.broadcast.exceptions import ExecutionStop
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.pipeline import Pipeline, Stage
+
+
+def recorded(calls: list) -> Pipeline:
+    def wrap(stage: Stage):
+        def func(dispatcher, state):
+            calls.append(stage.name)
+            return stage.func(dispatcher, state)
+
+        return Stage(stage.name, stage.cost, func)
+
+    return Pipeline(wrap(stage) for stage in AlconnaDispatcher.pipeline.stages)
+
+
+def test_default_stages_ordered_by_cost():
+    assert [(i.name, i.cost) for i in AlconnaDispatcher.pipeline.stages] == [
+        ("offender", 0),
+        ("tome", 10),
+        ("header", 20),
+        ("reply", 50),
+    ]
+
+
+def test_rejecting_stage_stops_later_stages(make_event):
+    calls, pulled = [], []
+    dispatcher = AlconnaDispatcher(Alconna("pipe_tome", Args["x", int]), need_tome=True, merge_reply=True)
+    dispatcher.pipeline = recorded(calls)
+    dispatcher.pipeline.stage("custom", 30)(lambda *_: calls.append("custom"))
+    event = make_event(MessageChain([Text("pipe_tome 1")]), mid="pipe-1", reply="0", pulled=pulled)
+
+    with pytest.raises(ExecutionStop):
+        asyncio.run(dispatcher.prepare(SimpleNamespace(event=event)))  # type: ignore
+    assert calls == ["offender", "tome"]
+    assert not pulled
+
+
+def test_custom_stage_runs_by_cost(make_event):
+    calls = []
+    dispatcher = AlconnaDispatcher(Alconna("pipe_custom", Args["x", int]))
+    dispatcher.pipeline = recorded(calls)
+
+    @dispatcher.pipeline.stage("custom", 15)
+    def custom(_, state):
+        calls.append("custom")
+        state.extra["seen"] = str(state.message)
+
+    state = asyncio.run(
+        dispatcher.prepare(SimpleNamespace(event=make_event(MessageChain([Text("pipe_custom 1")]), mid="pipe-2")))
+    )
+    assert calls == ["offender", "tome", "custom", "header", "reply"]
+    assert state.extra["seen"] == "pipe_custom 1"
+    assert "custom" not in AlconnaDispatcher.pipeline
@@ -0,0 +1,25 @@
+from arclet.alconna.argv import Argv, argv_config
+from avilla.core.elements import Face
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna import Alconna, Args
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.argv import BaseMessageChainArgv
+from arclet.alconna.avilla.router import CommandRouter
+
+
+def test_accept_follows_argv_filter_out():
+    config = Argv._cache[BaseMessageChainArgv]
+    origin = config["filter_out"]
+    argv_config(BaseMessageChainArgv, filter_out=[Face])
+    try:
+        dispatcher = AlconnaDispatcher(Alconna("router_filter", Args["x", int]))
+    finally:
+        config["filter_out"] = origin
+    router = CommandRouter()
+    router.add(dispatcher)
+    message = MessageChain([Face("1"), Text("router_filter 1")])
+    assert dispatcher.command.parse(message).matched
+    assert router.accept(dispatcher, message)
+    assert not router.accept(dispatcher, MessageChain([Face("1"), Text("other 1")]))
@@ -0,0 +1,47 @@
+from arclet.alconna import Alconna, Args, Option
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.routing import Route, RouteTable
+from arclet.alconna.avilla.tools import assign, match_path, match_value
+
+alc = Alconna("route_cmd", Option("add", Args["x", int]), Option("mode", Args["m", str]))
+
+
+def routes_of(modifier) -> list:
+    def listener(): ...
+
+    modifier(listener)
+    return listener.__schema_buffer__["decorators"]
+
+
+def test_match_returns_routes():
+    assert isinstance(match_path("add"), Route) and isinstance(match_value("mode.m", "fast"), Route)
+    assert match_path("add").key == match_path("add").key
+    assert match_value("mode.m", "fast").key != match_value("mode.m", "slow").key
+    assert match_path("add").predicate(alc.parse("route_cmd add 1"))
+    assert not match_path("add").predicate(alc.parse("route_cmd"))
+    assert match_path("$main").predicate(alc.parse("route_cmd"))
+    assert not match_path("$main").predicate(alc.parse("route_cmd add 1"))
+    assert match_value("mode.m", "fast").predicate(alc.parse("route_cmd mode fast"))
+    assert not match_value("mode.m", "fast").predicate(alc.parse("route_cmd mode slow"))
+    assert match_value("mode.m", "fast", or_not=True).predicate(alc.parse("route_cmd"))
+
+
+def test_route_table_selects_assigned_dispatchers():
+    table = RouteTable()
+    main, add, fast, slow, plain = (AlconnaDispatcher(alc) for _ in range(5))
+    table.add(main, routes_of(assign("$main")))
+    table.add(add, routes_of(assign("add")))
+    table.add(fast, routes_of(assign("mode.m", "fast")))
+    table.add(slow, routes_of(assign("mode.m", "slow")))
+    table.add(plain, ())
+
+    assert table.allows(add, "1") is None
+    assert table.allows(plain, "1") is True
+    assert table.select("1", alc.parse("route_cmd mode fast")) == {fast}
+    assert table.allows(fast, "1") and not table.allows(slow, "1") and not table.allows(main, "1")
+    assert table.select("2", alc.parse("route_cmd")) == {main}
+    assert table.select("3", alc.parse("route_cmd add 1")) == {add}
+    assert table.allows(main, "2") and not table.allows(main, "3")
+
+    table.remove(add)
+    assert table.allows(add, "3") is True
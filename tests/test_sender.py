@@ -0,0 +1,33 @@
+import asyncio
+from types import SimpleNamespace
+
+from graia.amnesia.message import MessageChain
+from graia.amnesia.message.element import Text
+
+from arclet.alconna.avilla import AlconnaDispatcher
+from arclet.alconna.avilla.sender import OutputSender
+
+
+def test_sender_is_opt_in():
+    assert AlconnaDispatcher.output_sender is None
+
+
+def test_full_queue_merges_by_default():
+    sent = []
+
+    class Scene:
+        async def send_message(self, message):
+            sent.append(str(message))
+
+    ctx = SimpleNamespace(account=SimpleNamespace(route="bot"), scene=Scene())
+
+    async def main():
+        sender = OutputSender({"max_queue": 1})
+        for text in ("a", "b", "c"):
+            assert sender.submit(ctx, MessageChain([Text(text)]))  # type: ignore
+        await sender.flush()
+        return sender.stats
+
+    stats = asyncio.run(main())
+    assert sent == ["a\nb\nc"]
+    assert stats["dropped"] == 0
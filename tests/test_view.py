@@ -0,0 +1,24 @@
+from graia.amnesia.message import Element, MessageChain, Text
+
+from arclet.alconna.avilla.view import ChainView
+
+
+class Marker(Element):
+    def __str__(self):
+        return "[marker]"
+
+
+def test_views_do_not_touch_origin():
+    marker = Marker()
+    origin = MessageChain([Text("!cmd  arg"), marker, Text("tail  ")])
+    prefix = ChainView.trim_prefix(origin, 0, 4, (Marker,))
+    assert prefix._chain is None
+    assert prefix.chain.content[0] is marker
+    assert [str(i) for i in prefix.chain.content[1:]] == ["arg", "tail  "]
+    assert prefix.chain is prefix.chain
+
+    suffix = ChainView.trim_suffix(origin, 2, 4)
+    assert str(suffix.chain) == "!cmd  arg[marker]tail"
+    assert str(ChainView(origin, 0).chain) == "[marker]tail  "
+    assert str(origin) == "!cmd  arg[marker]tail  "
+    assert origin.content[1] is marker